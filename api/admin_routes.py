@@ -1,13 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from database.database import get_db
-from database.models import User, Prediction
-from schemas.user_schema import UserResponse
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, func, case, delete, update
+from sqlalchemy.orm import Session, sessionmaker
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from config import settings
+from database.database import get_db, get_session_factory
+from database.models import User, Prediction, PredictionDailyRollup
+from database.rollups import remove_user_predictions
+from schemas.user_schema import UserResponse, BulkUserAction
 from auth.jwt_handler import get_current_admin
+from auth.user_cache import invalidate_user
+from ml.model_handler import model_handler
+from ml.registry import model_registry
+from api.prediction_routes import HISTORY_FIELDS
+from utils.export import export_response
+from utils.cache import TTLCache
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+# Statistiques du tableau de bord, invalidées à chaque modification d'utilisateur
+stats_cache = TTLCache(maxsize=1, ttl=settings.ADMIN_STATS_CACHE_TTL)
+
 @router.get("/users", response_model=List[UserResponse])
 def list_users(
     skip: int = 0,
@@ -37,15 +50,66 @@ def delete_user(
     if user.id == current_admin.id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
-    # Supprimer d'abord les prédictions de l'utilisateur
-    db.query(Prediction).filter(Prediction.user_id == user_id).delete()
+    # Retirer ses prédictions des rollups ; la base les supprime (ON DELETE CASCADE)
+    remove_user_predictions(db, [user_id])
     
     # Supprimer l'utilisateur
+    username = user.username
     db.delete(user)
     db.commit()
+    invalidate_user(username)
+    stats_cache.clear()
     
     return {"message": "User deleted successfully"}
 
+def apply_bulk_action(db: Session, action: str, user_ids: List[int]) -> List[str]:
+    """
+    Appliquer une action à un ensemble d'utilisateurs en une instruction SQL,
+    sans charger d'objets ORM. Renvoie les noms des utilisateurs touchés.
+    Le commit est laissé à l'appelant.
+    """
+    if action == "delete":
+        remove_user_predictions(db, user_ids)
+        statement = delete(User).where(User.id.in_(user_ids))
+    else:
+        statement = (
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values(is_active=(action == "activate"))
+        )
+
+    return db.scalars(
+        statement.returning(User.username),
+        execution_options={"synchronize_session": False}
+    ).all()
+
+@router.post("/users/bulk")
+def bulk_user_action(
+    bulk_action: BulkUserAction,
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Supprimer, activer ou désactiver plusieurs utilisateurs en une transaction (admin seulement)
+    """
+    user_ids = sorted(set(bulk_action.user_ids))
+    if len(user_ids) > settings.ADMIN_BULK_MAX_USERS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many users: at most {settings.ADMIN_BULK_MAX_USERS} per request"
+        )
+    if current_admin.id in user_ids:
+        raise HTTPException(status_code=400, detail="Cannot apply a bulk action to yourself")
+    
+    usernames = apply_bulk_action(db, bulk_action.action, user_ids) if user_ids else []
+    db.commit()
+    
+    for username in usernames:
+        invalidate_user(username)
+    stats_cache.clear()
+    
+    return {"action": bulk_action.action, "affected": len(usernames)}
+
 @router.put("/users/{user_id}/toggle-admin")
 def toggle_admin_status(
     user_id: int,
@@ -65,6 +129,8 @@ def toggle_admin_status(
     user.is_admin = not user.is_admin
     db.commit()
     db.refresh(user)
+    invalidate_user(user.username)
+    stats_cache.clear()
     
     return {"message": f"User admin status updated to {user.is_admin}"}
 
@@ -87,6 +153,8 @@ def toggle_user_active(
     user.is_active = not user.is_active
     db.commit()
     db.refresh(user)
+    invalidate_user(user.username)
+    stats_cache.clear()
     
     return {"message": f"User active status updated to {user.is_active}"}
 
@@ -96,16 +164,180 @@ def get_admin_stats(
     db: Session = Depends(get_db)
 ):
     """
-    Obtenir les statistiques administratives
+    Obtenir les statistiques administratives (mises en cache ADMIN_STATS_CACHE_TTL secondes)
+    """
+    stats = stats_cache.get("stats")
+    if stats is None:
+        stats = compute_admin_stats(db)
+        stats_cache.set("stats", stats)
+    return stats
+
+def compute_admin_stats(db: Session) -> Dict:
+    """
+    Compteurs en une seule requête (comptages conditionnels), puis les
+    histogrammes de prédictions par classe et par jour, lus dans les rollups
+    """
+    rollup = PredictionDailyRollup
+    total_predictions = select(func.coalesce(func.sum(rollup.prediction_count), 0)).scalar_subquery()
+    counts = db.execute(
+        select(
+            func.count(User.id),
+            func.count(case((User.is_active == True, 1))),
+            func.count(case((User.is_admin == True, 1))),
+            total_predictions
+        )
+    ).one()
+
+    per_class = db.execute(
+        select(rollup.predicted_class, func.sum(rollup.prediction_count))
+        .group_by(rollup.predicted_class)
+    ).all()
+
+    since = datetime.utcnow().date() - timedelta(days=settings.STATS_HISTOGRAM_DAYS)
+    per_day = db.execute(
+        select(rollup.day, func.sum(rollup.prediction_count))
+        .where(rollup.day >= since)
+        .group_by(rollup.day)
+        .order_by(rollup.day)
+    ).all()
+
+    return {
+        "total_users": counts[0],
+        "active_users": counts[1],
+        "admin_users": counts[2],
+        "total_predictions": counts[3],
+        "predictions_per_class": {predicted_class: count for predicted_class, count in per_class},
+        "predictions_per_day": {day.isoformat(): count for day, count in per_day},
+    }
+
+@router.get("/analytics")
+def get_analytics(
+    days: int = Query(settings.STATS_HISTOGRAM_DAYS, ge=1, le=3660),
+    predicted_class: Optional[str] = None,
+    gender: Optional[str] = None,
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Prédictions par jour, classe et genre sur les `days` derniers jours (admin seulement).
+    Ne lit que les rollups : le coût ne dépend pas de la taille de la table predictions.
     """
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    admin_users = db.query(User).filter(User.is_admin == True).count()
-    total_predictions = db.query(Prediction).count()
+    rollup = PredictionDailyRollup
+    since = datetime.utcnow().date() - timedelta(days=days)
+    query = select(rollup).where(rollup.day >= since).order_by(rollup.day, rollup.predicted_class, rollup.gender)
+    if predicted_class is not None:
+        query = query.where(rollup.predicted_class == predicted_class)
+    if gender is not None:
+        query = query.where(rollup.gender == gender)
+
+    rows = db.scalars(query).all()
+
+    per_class: Dict[str, Dict] = {}
+    for row in rows:
+        totals = per_class.setdefault(row.predicted_class, {"count": 0, "confidence_sum": 0.0, "bmi_sum": 0.0})
+        totals["count"] += row.prediction_count
+        totals["confidence_sum"] += row.confidence_sum
+        totals["bmi_sum"] += row.bmi_sum
+
+    return {
+        "since": since.isoformat(),
+        "rows": [
+            {
+                "day": row.day.isoformat(),
+                "predicted_class": row.predicted_class,
+                "gender": row.gender,
+                "count": row.prediction_count,
+                "mean_confidence": row.confidence_sum / row.prediction_count,
+                "mean_bmi": row.bmi_sum / row.prediction_count,
+            }
+            for row in rows
+        ],
+        "per_class": {
+            name: {
+                "count": totals["count"],
+                "mean_confidence": totals["confidence_sum"] / totals["count"],
+                "mean_bmi": totals["bmi_sum"] / totals["count"],
+            }
+            for name, totals in per_class.items()
+        },
+    }
+
+@router.get("/predictions/export")
+def export_predictions(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|parquet)$"),
+    user_id: Optional[int] = None,
+    current_admin: User = Depends(get_current_admin),
+    session_factory: sessionmaker = Depends(get_session_factory)
+):
+    """
+    Exporter toutes les prédictions en CSV ou Parquet, en flux (admin seulement)
+    """
+    columns = ["user_id"] + list(HISTORY_FIELDS)
+    query = select(*[getattr(Prediction, name) for name in columns]).order_by(Prediction.id)
+    if user_id is not None:
+        query = query.where(Prediction.user_id == user_id)
+    return export_response(session_factory, query, columns, export_format, "predictions_all")
+
+@router.post("/model/reload")
+def reload_model(
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    Recharger le modèle depuis le disque sans redémarrer (admin seulement)
+    """
+    try:
+        return model_handler.reload_model()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {str(e)}")
+
+def switch_model_version(switch) -> Dict:
+    """
+    Déplacer le pointeur du registre puis recharger le modèle ; si le rechargement
+    échoue, l'ancien pointeur est rétabli et l'ancien modèle reste actif
+    """
+    try:
+        previous_pointer = switch()
+    except (ValueError, FileNotFoundError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
+    try:
+        return model_handler.reload_model()
+    except Exception as e:
+        model_registry.restore_pointer(previous_pointer)
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {str(e)}")
+
+@router.get("/model/versions")
+def list_model_versions(
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    Lister les versions du registre des modèles (admin seulement)
+    """
     return {
-        "total_users": total_users,
-        "active_users": active_users,
-        "admin_users": admin_users,
-        "total_predictions": total_predictions
-    }
\ No newline at end of file
+        "current": model_registry.current(),
+        "loaded": model_handler.model_version,
+        "versions": [
+            {"version": version, "created_at": model_registry.manifest(version)["created_at"]}
+            for version in reversed(model_registry.versions())
+        ],
+    }
+
+@router.post("/model/activate/{version}")
+def activate_model_version(
+    version: str,
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    Activer une version du registre (admin seulement). Seul ce worker la charge ;
+    les autres ne la suivent que si MODEL_WATCH_INTERVAL > 0 (désactivé par défaut)
+    """
+    return switch_model_version(lambda: model_registry.set_current(version))
+
+@router.post("/model/rollback")
+def rollback_model_version(
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    Revenir à la version du registre active avant la version courante (admin seulement)
+    """
+    return switch_model_version(model_registry.rollback)
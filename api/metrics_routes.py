@@ -2,6 +2,11 @@ from fastapi import APIRouter, Depends
 from auth.jwt_handler import get_current_user
 from database.models import User
 from ml.model_handler import model_handler
+from auth.user_cache import user_cache
+from auth.password_pool import password_pool
+from database.database import engine
+from database.pool_metrics import get_pool_status
+from database.write_behind import prediction_writer
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
@@ -10,7 +15,22 @@ def get_model_metrics(current_user: User = Depends(get_current_user)):
     """
     Obtenir les métriques du modèle ML
     """
-    return model_handler.get_model_info()
+    return {
+        **model_handler.get_model_info(),
+        "prediction_cache": model_handler.cache.stats(),
+        "auth_user_cache": user_cache.stats(),
+        "password_hash_pool": password_pool.stats(),
+        "database_pool": get_pool_status(engine),
+        "prediction_writer": prediction_writer.stats()
+    }
+
+@router.get("/drift")
+def get_drift_metrics(current_user: User = Depends(get_current_user)):
+    """
+    Dérive des entrées et des classes prédites par rapport à la référence
+    d'entraînement du modèle actif (PSI par feature, KS pour les numériques)
+    """
+    return model_handler.drift_report()
 
 @router.get("/health")
 def health_check():
@@ -18,7 +38,10 @@ def health_check():
     Vérifier l'état de santé de l'API
     """
     return {
-        "status": "healthy",
-        "model_loaded": model_handler.model is not None,
+        "status": "healthy" if model_handler.is_ready else "starting",
+        "ready": model_handler.is_ready,
+        "model_loaded": model_handler.engine is not None,
+        "model_error": model_handler.load_error,
+        "model_version": model_handler.model_version,
         "version": "1.0.0"
     }
\ No newline at end of file
@@ -1,16 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-import json
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert, select, func, tuple_
+from sqlalchemy.orm import Session, sessionmaker
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
 
-from database.database import get_db
+from config import settings
+from database.database import get_db, get_session_factory
 from database.models import User, Prediction
-from schemas.prediction_schema import PredictionInput, PredictionOutput, PredictionHistory
+from database.rollups import add_predictions
+from database.write_behind import prediction_writer
+from schemas.prediction_schema import PredictionInput, PredictionOutput, PredictionHistory, PredictionHistoryPage
 from auth.jwt_handler import get_current_user
-from ml.model_handler import model_handler 
+from ml.model_handler import model_handler
+from ml.batcher import prediction_batcher, run_inference
+from utils.export import export_response
 
 router = APIRouter()
 
+def prediction_row(user_id: int, prediction_input: PredictionInput, prediction_result: dict, created_at: datetime) -> dict:
+    """
+    Column values of one Prediction row.
+    """
+    return {
+        "user_id": user_id,
+        # Unpack all input fields from the Pydantic model
+        **prediction_input.model_dump(),
+        # Add prediction results
+        "predicted_class": prediction_result["predicted_class"],
+        "confidence": prediction_result["confidence"],
+        "probabilities": prediction_result["probabilities"],
+        # Set explicitly so the daily rollup uses the same timestamp
+        "created_at": created_at
+    }
+
+def save_prediction(db: Session, user_id: int, prediction_input: PredictionInput, prediction_result: dict):
+    """
+    Persists one prediction and its rollup increment in one transaction
+    (blocking: run it in the threadpool from async routes).
+    """
+    row = prediction_row(user_id, prediction_input, prediction_result, datetime.utcnow())
+
+    db.add(Prediction(**row))
+    add_predictions(db, [row])
+    db.commit()
+
+def save_predictions(db: Session, user_id: int, prediction_inputs: List[PredictionInput], prediction_results: List[dict]):
+    """
+    Persists a batch of predictions with one bulk INSERT and one rollup upsert (blocking).
+    """
+    created_at = datetime.utcnow()
+    rows = [
+        prediction_row(user_id, prediction_input, result, created_at)
+        for prediction_input, result in zip(prediction_inputs, prediction_results)
+    ]
+
+    db.execute(insert(Prediction), rows)
+    add_predictions(db, rows)
+    db.commit()
+
+def queue_predictions(user_id: int, prediction_inputs: List[PredictionInput], prediction_results: List[dict]) -> bool:
+    """
+    Hands rows to the write-behind writer when PREDICTION_WRITE_MODE is "write_behind".
+    Returns False when they must be saved synchronously (sync mode, writer stopped or queue full).
+    """
+    if settings.PREDICTION_WRITE_MODE != "write_behind":
+        return False
+
+    created_at = datetime.utcnow()
+    return prediction_writer.submit([
+        prediction_row(user_id, prediction_input, result, created_at)
+        for prediction_input, result in zip(prediction_inputs, prediction_results)
+    ])
+
 @router.post("/", response_model=PredictionOutput)
 async def create_prediction(
     prediction_input: PredictionInput,
@@ -21,23 +84,17 @@ async def create_prediction(
     Creates a new prediction for the authenticated user.
     """
     try:
-        # 1. Get prediction from the encapsulated model handler
-        prediction_result = model_handler.predict(prediction_input)
+        # 1. Get prediction from the model handler, coalesced with concurrent
+        #    requests into one matrix scored off the event loop
+        if settings.PREDICTION_BATCHING:
+            prediction_result = await prediction_batcher.predict(prediction_input)
+        else:
+            prediction_result = await run_inference(model_handler.predict, prediction_input)
         
-        # 2. Create a new prediction entry in the database
-        new_prediction = Prediction(
-            user_id=current_user.id,
-            # Unpack all input fields from the Pydantic model
-            **prediction_input.model_dump(),
-            # Add prediction results
-            predicted_class=prediction_result["predicted_class"],
-            confidence=prediction_result["confidence"],
-            probabilities=json.dumps(prediction_result["probabilities"])  # Serialize to JSON string
-        )
-        
-        db.add(new_prediction)
-        db.commit()
-        db.refresh(new_prediction)
+        # 2. Queue it for write-behind, or save it without blocking the event
+        #    loop on the synchronous session
+        if not queue_predictions(current_user.id, [prediction_input], [prediction_result]):
+            await run_in_threadpool(save_prediction, db, current_user.id, prediction_input, prediction_result)
         
         return prediction_result
 
@@ -48,18 +105,134 @@ async def create_prediction(
             detail=f"An error occurred during prediction: {str(e)}"
         )
 
-@router.get("/history", response_model=List[PredictionHistory])
-async def get_my_predictions(
+@router.post("/batch", response_model=List[PredictionOutput])
+async def create_batch_prediction(
+    prediction_inputs: List[PredictionInput],
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Creates predictions for a batch of inputs (e.g. a screening file) in one call.
+    """
+    if len(prediction_inputs) > settings.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: at most {settings.MAX_BATCH_SIZE} rows per request"
+        )
+
+    try:
+        # 1. Score every row in a single vectorized pass on the inference pool
+        prediction_results = await run_inference(model_handler.predict_batch, prediction_inputs)
+
+        # 2. Persist all predictions with one bulk INSERT
+        if prediction_results and not queue_predictions(current_user.id, prediction_inputs, prediction_results):
+            await run_in_threadpool(
+                save_predictions, db, current_user.id, prediction_inputs, prediction_results
+            )
+
+        return prediction_results
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"An error occurred during batch prediction: {str(e)}"
+        )
+
+# Fields a history row can expose, in PredictionHistory order
+HISTORY_FIELDS = tuple(PredictionHistory.model_fields)
+
+def encode_cursor(created_at: datetime, prediction_id: int) -> str:
+    """
+    Opaque keyset cursor: the (created_at, id) of the last row of a page.
+    """
+    raw = f"{created_at.isoformat()}|{prediction_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, prediction_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(prediction_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """
+    Columns to select for a history page. id and created_at are always
+    included since the next cursor is built from them.
+    """
+    if not fields:
+        return list(HISTORY_FIELDS)
+
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in HISTORY_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return ["id", "created_at"] + [name for name in requested if name not in ("id", "created_at")]
+
+@router.get("/history", response_model=PredictionHistoryPage)
+def get_my_predictions(
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(settings.HISTORY_PAGE_SIZE, ge=1, le=settings.HISTORY_MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. confidence,predicted_class"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Gets the prediction history for the currently authenticated user.
+    Gets one page of the prediction history for the currently authenticated user,
+    newest first. Declared sync so FastAPI runs the blocking query in its threadpool.
+
+    Pages are keyset-paginated on (created_at, id): each page is a bounded range
+    scan of ix_predictions_user_created, however deep the client pages.
+    """
+    columns = [getattr(Prediction, name) for name in parse_fields(fields)]
+
+    query = (
+        select(*columns)
+        .where(Prediction.user_id == current_user.id)
+        .order_by(Prediction.created_at.desc(), Prediction.id.desc())
+        # One extra row tells whether another page exists
+        .limit(limit + 1)
+    )
+    if cursor:
+        created_at, prediction_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(Prediction.created_at, Prediction.id) < tuple_(created_at, prediction_id)
+        )
+
+    rows = db.execute(query).mappings().all()
+    has_more = len(rows) > limit
+    items = [dict(row) for row in rows[:limit]]
+
+    page = {
+        "items": items,
+        "has_more": has_more,
+        "next_cursor": encode_cursor(items[-1]["created_at"], items[-1]["id"]) if has_more else None,
+    }
+    if cursor is None:
+        # Index-only count, only on the first page
+        page["total"] = db.scalar(
+            select(func.count()).select_from(Prediction).where(Prediction.user_id == current_user.id)
+        )
+    return page
+
+@router.get("/export")
+def export_my_predictions(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|parquet)$"),
+    current_user: User = Depends(get_current_user),
+    session_factory: sessionmaker = Depends(get_session_factory)
+):
+    """
+    Streams the authenticated user's whole prediction history as CSV or Parquet.
+    Rows are read from a server-side cursor in chunks, so memory stays flat
+    whatever the history size.
     """
-    # Query all predictions belonging to the current user
-    predictions = db.query(Prediction).filter(Prediction.user_id == current_user.id).order_by(Prediction.created_at.desc()).all()
-    
-    # The response_model will automatically handle the conversion
-    # from SQLAlchemy objects to Pydantic models because `from_attributes = True`
-    # is set in your PredictionHistory schema.
-    return predictions
\ No newline at end of file
+    columns = list(HISTORY_FIELDS)
+    query = (
+        select(*[getattr(Prediction, name) for name in columns])
+        .where(Prediction.user_id == current_user.id)
+        .order_by(Prediction.created_at.desc(), Prediction.id.desc())
+    )
+    return export_response(session_factory, query, columns, export_format, "predictions")
@@ -1,4 +1,6 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Depends, HTTPException, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -7,20 +9,56 @@ import json
 
 from config import settings
 from database.database import create_tables, get_db
+from database.write_behind import prediction_writer
 from database.models import User
 from auth import auth_routes
 from api import prediction_routes, admin_routes, metrics_routes
 from auth.jwt_handler import get_current_user
 from schemas.prediction_schema import PredictionInput
+from ml.model_handler import model_handler
+from ml.batcher import prediction_batcher
+from ml.model_watcher import model_watcher
 
 from fastapi.middleware.cors import CORSMiddleware
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Démarrage : création des tables et chargement du modèle (hors de l'import,
+    pour que l'import de l'application et la collecte des tests restent rapides).
+    Arrêt : fin de la surveillance du modèle et du regroupeur de prédictions,
+    puis vidage de la file d'écriture différée.
+    """
+    await run_in_threadpool(create_tables)
+    
+    try:
+        if not model_handler.is_ready:
+            await run_in_threadpool(model_handler.load_model)
+    except Exception:
+        # L'API démarre quand même ; /metrics/health indique ready=false
+        pass
+    
+    # Surveillance des artefacts du modèle pour le rechargement à chaud
+    if settings.MODEL_WATCH_INTERVAL > 0:
+        model_watcher.start()
+    
+    if settings.PREDICTION_WRITE_MODE == "write_behind":
+        prediction_writer.start()
+    
+    yield
+    
+    model_watcher.stop()
+    await prediction_batcher.close()
+    # Enregistrer les prédictions encore en file avant de quitter
+    await run_in_threadpool(prediction_writer.stop)
+
 # Créer l'application FastAPI
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
-    description="API de prédiction d'obésité avec authentification JWT"
+    description="API de prédiction d'obésité avec authentification JWT",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -31,9 +69,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Créer les tables au démarrage
-create_tables()
-
 # Configuration des fichiers statiques et templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
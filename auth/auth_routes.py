@@ -6,14 +6,26 @@ from database.models import User
 from schemas.user_schema import UserCreate, UserLogin, Token, UserResponse
 from auth.jwt_handler import (
     get_password_hash, 
-    verify_password, 
+    verify_and_update_password, 
     create_access_token,
     get_current_user
 )
+from auth.password_pool import password_pool, PasswordPoolSaturated
 from config import settings
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+def run_password_task(func, *args):
+    """Exécuter une opération bcrypt dans le pool borné, 429 s'il est saturé"""
+    try:
+        return password_pool.run(func, *args)
+    except PasswordPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many authentication requests, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
 @router.post("/register", response_model=UserResponse)
 def register(user: UserCreate, db: Session = Depends(get_db)):
     # Vérifier si l'utilisateur existe déjà
@@ -29,7 +41,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Créer le nouvel utilisateur
-    hashed_password = get_password_hash(user.password)
+    hashed_password = run_password_task(get_password_hash, user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -49,7 +61,13 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
 def login(user: UserLogin, db: Session = Depends(get_db)):
     db_user = db.query(User).filter(User.username == user.username).first()
     
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    password_valid, new_hash = False, None
+    if db_user:
+        password_valid, new_hash = run_password_task(
+            verify_and_update_password, user.password, db_user.hashed_password
+        )
+    
+    if not password_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -62,9 +80,14 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
             detail="Inactive user"
         )
     
+    # Le coût bcrypt configuré a changé : régénérer le hachage de façon transparente
+    if new_hash:
+        db_user.hashed_password = new_hash
+        db.commit()
+    
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": db_user.username}, expires_delta=access_token_expires
+        data={"sub": db_user.username, "uid": db_user.id}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
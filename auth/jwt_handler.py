@@ -8,13 +8,25 @@ from config import settings
 from database.database import get_db
 from database.models import User
 from schemas.user_schema import TokenData
+from auth.user_cache import get_cached_user, cache_user
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Tout hachage d'un coût différent de BCRYPT_ROUNDS est signalé comme à régénérer
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_desired_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_desired_rounds=settings.BCRYPT_ROUNDS
+)
 security = HTTPBearer()
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password, hashed_password):
+    """Renvoie (valide, nouveau_hachage) ; nouveau_hachage est None si le coût est à jour"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password):
     return pwd_context.hash(password)
 
@@ -39,7 +51,8 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        token_data = TokenData(username=username)
+        # "uid" absent des jetons émis avant son introduction
+        token_data = TokenData(username=username, user_id=payload.get("uid"))
         return token_data
     except JWTError:
         raise HTTPException(
@@ -49,13 +62,27 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
         )
 
 def get_current_user(token_data: TokenData = Depends(verify_token), db: Session = Depends(get_db)):
+    # Chemin rapide : utilisateur déjà vu récemment, aucune requête SQL
+    user = get_cached_user(token_data.username, token_data.user_id)
+    if user is not None:
+        return user
+    
     user = db.query(User).filter(User.username == token_data.username).first()
-    if user is None:
+    # Terminer la transaction de lecture : la connexion retourne au pool tout de
+    # suite, la requête pouvant ensuite attendre l'inférence ou un thread libre.
+    # L'utilisateur est détaché d'abord pour ne pas être expiré (et rechargé) ;
+    # la session reste utilisable pour la suite de la requête (get_db la ferme)
+    if user is not None:
+        db.expunge(user)
+    db.commit()
+    # Nom supprimé puis réenregistré : le jeton de l'ancien compte n'est plus valide
+    if user is None or (token_data.user_id is not None and user.id != token_data.user_id):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    cache_user(user)
     return user
 
 def get_current_admin(current_user: User = Depends(get_current_user)):
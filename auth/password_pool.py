@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from config import settings
+
+
+class PasswordPoolSaturated(Exception):
+    """Trop de hachages bcrypt en cours ou en attente"""
+
+
+class PasswordHashPool:
+    """
+    Pool borné pour les opérations bcrypt (hachage et vérification).
+
+    Au plus `max_workers` hachages s'exécutent en parallèle (bcrypt libère le
+    GIL) et au plus `max_pending` attendent derrière eux. Au-delà, submit lève
+    PasswordPoolSaturated immédiatement au lieu d'empiler du travail CPU :
+    les routes répondent 429.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+
+    def run(self, func: Callable, *args):
+        """Exécuter func dans le pool et attendre son résultat (appel bloquant)"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordPoolSaturated()
+
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release)
+        return future.result()
+
+    def _release(self, _future):
+        self._slots.release()
+        with self._lock:
+            self.completed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+# Instance globale du pool de hachage
+password_pool = PasswordHashPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
@@ -0,0 +1,43 @@
+from typing import Dict, Optional
+
+from config import settings
+from database.models import User
+from utils.cache import TTLCache
+
+# Colonnes conservées en cache (jamais le hash du mot de passe)
+USER_FIELDS = ("id", "username", "email", "is_admin", "is_active", "created_at")
+
+# Cache par processus, par nom d'utilisateur : les routes admin l'invalident, le
+# TTL court borne l'obsolescence d'une modification faite par un autre worker.
+# L'id du jeton est comparé à celui de l'entrée : un nom supprimé puis
+# réenregistré ailleurs pendant le TTL ne ressert jamais l'ancien compte
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+
+def get_cached_user(username: str, user_id: Optional[int]) -> Optional[User]:
+    """
+    Reconstruire un User (transitoire, hors session) depuis le cache, si l'entrée
+    est bien celle du compte `user_id`. Sans id (ancien jeton), le cache n'est pas
+    consulté
+    """
+    if user_id is None:
+        return None
+    snapshot = user_cache.get(username)
+    if snapshot is None:
+        return None
+    if snapshot["id"] != user_id:
+        # Entrée d'un autre compte du même nom : la base tranchera
+        user_cache.pop(username)
+        return None
+    return User(**snapshot)
+
+
+def cache_user(user: User):
+    """Mettre en cache les colonnes utiles d'un utilisateur"""
+    snapshot: Dict = {field: getattr(user, field) for field in USER_FIELDS}
+    user_cache.set(user.username, snapshot)
+
+
+def invalidate_user(username: str):
+    """Retirer un utilisateur du cache après une modification"""
+    user_cache.pop(username)
@@ -0,0 +1,145 @@
+"""
+Taille sur disque et temps de chargement des formats d'artefacts du modèle.
+
+Compare, pour le modèle actif (registre ou chemins de settings) :
+- les trois pickles séparés (model.pkl, scaler.pkl, label_encoders.pkl) ;
+- le bundle fusionné en pickle brut et compressé par joblib (zlib, lzma, lz4
+  si installé) à plusieurs niveaux ;
+- la forêt aplatie en .npy chargée en mmap, avec preprocessing.joblib
+  (ce que charge le moteur mmap, sans désérialiser l'estimateur).
+
+Les fichiers sont relus depuis le cache de pages : le temps mesuré est celui
+de la désérialisation (et de la décompression), pas celui du disque.
+
+Usage : python -m benchmarks.bench_artifacts [--repeat 20]
+"""
+import argparse
+import os
+import pickle
+import statistics
+import tempfile
+import time
+
+from sklearn.preprocessing import LabelEncoder
+
+from ml.bundle import build_bundle, load_bundle, preprocessing_bundle, save_bundle, unpack_bundle
+from ml.model_handler import CATEGORICAL_COLUMNS, FEATURE_COLUMNS
+from ml.registry import model_registry
+from ml.tree_engine import FlatForest
+
+BUNDLE_VARIANTS = [
+    ("bundle pickle brut", 0, "zlib"),
+    ("bundle joblib zlib 1", 1, "zlib"),
+    ("bundle joblib zlib 3", 3, "zlib"),
+    ("bundle joblib zlib 9", 9, "zlib"),
+    ("bundle joblib lzma 3", 3, "lzma"),
+    ("bundle joblib lz4 3", 3, "lz4"),
+]
+
+
+def load_active_bundle() -> dict:
+    """Bundle du modèle actif, reconstruit depuis les pickles séparés si besoin"""
+    artifacts = model_registry.resolve()
+    if os.path.isfile(artifacts.pipeline):
+        return load_bundle(artifacts.pipeline)
+
+    with open(artifacts.model, "rb") as f:
+        model = pickle.load(f)
+    with open(artifacts.scaler, "rb") as f:
+        scaler = pickle.load(f)
+    with open(artifacts.encoders, "rb") as f:
+        label_encoders = pickle.load(f)
+    return build_bundle(FEATURE_COLUMNS, CATEGORICAL_COLUMNS, label_encoders, scaler, model)
+
+
+def write_separate_pickles(bundle: dict, directory: str) -> list:
+    """Écrire les trois pickles comme l'entraînement le faisait avant le bundle"""
+    model, scaler, categories, target_classes = unpack_bundle(bundle)
+    label_encoders = {}
+    for name, classes in list(categories.items()) + [("target", target_classes)]:
+        encoder = LabelEncoder()
+        encoder.classes_ = classes
+        label_encoders[name] = encoder
+
+    paths = []
+    for name, value in (("model.pkl", model), ("scaler.pkl", scaler), ("label_encoders.pkl", label_encoders)):
+        path = os.path.join(directory, name)
+        with open(path, "wb") as f:
+            pickle.dump(value, f)
+        paths.append(path)
+    return paths
+
+
+def load_pickles(paths: list):
+    for path in paths:
+        with open(path, "rb") as f:
+            pickle.load(f)
+
+
+def measure(load, repeat: int) -> float:
+    """Temps de chargement médian en ms (après un chargement d'échauffement)"""
+    load()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def directory_size(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    bundle = load_active_bundle()
+    model = bundle["pipeline"].named_steps["model"]
+    print(f"Modèle : {type(model).__name__}, {getattr(model, 'n_estimators', '-')} estimateurs\n")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_separate_pickles(bundle, tmp)
+        results.append((
+            "3 pickles séparés", sum(os.path.getsize(path) for path in paths),
+            measure(lambda: load_pickles(paths), args.repeat)
+        ))
+
+        for label, compress, method in BUNDLE_VARIANTS:
+            path = os.path.join(tmp, f"pipeline-{method}-{compress}.joblib")
+            try:
+                save_bundle(bundle, path, compress=compress, method=method)
+            except (ValueError, ImportError) as e:
+                print(f"{label} ignoré : {e}")
+                continue
+            results.append((label, os.path.getsize(path), measure(lambda: load_bundle(path), args.repeat)))
+
+        forest_dir = os.path.join(tmp, "forest")
+        preprocessing_path = os.path.join(tmp, "preprocessing.joblib")
+        save_bundle(preprocessing_bundle(bundle), preprocessing_path)
+
+        def load_mmap():
+            load_bundle(preprocessing_path)
+            FlatForest.load(forest_dir, mmap_mode="r")
+
+        try:
+            FlatForest.from_sklearn(model).save(forest_dir)
+            results.append((
+                "préprocesseurs + forêt .npy en mmap",
+                directory_size(forest_dir) + os.path.getsize(preprocessing_path),
+                measure(load_mmap, args.repeat)
+            ))
+        except ValueError:
+            pass
+
+    baseline_ms = results[0][2]
+    print(f"{'format':<42} {'taille':>10} {'chargement':>12} {'vs pickles':>11}")
+    for label, size, load_ms in results:
+        print(f"{label:<42} {size / 2**20:>7.2f} Mo {load_ms:>9.2f} ms {baseline_ms / load_ms:>10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Suppression de comptes en masse : une requête par utilisateur vs action groupée.
+
+Crée `--users` utilisateurs avec `--predictions` prédictions chacun dans une
+base SQLite, puis mesure :
+- l'ancien chemin de DELETE /admin/users/{id}, répété pour chaque utilisateur
+  (chargement ORM, suppression des prédictions, suppression, commit) ;
+- POST /admin/users/bulk (apply_bulk_action) : désactivation puis suppression
+  de tous les utilisateurs en une transaction, prédictions supprimées par cascade.
+
+Usage : python -m benchmarks.bench_bulk_users [--users 10000] [--predictions 10]
+"""
+import argparse
+import os
+import time
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from api.admin_routes import apply_bulk_action
+from benchmarks.bench_history import seed
+from database.database import enable_sqlite_foreign_keys
+from database.models import Prediction, User
+from database.rollups import rebuild_rollups
+
+
+def fresh_session(path: str, users: int, predictions: int):
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", enable_sqlite_foreign_keys)
+    seed(engine, users * predictions, heavy_rows=0, users=users)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        rebuild_rollups(db)
+    return Session()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--predictions", type=int, default=10)
+    parser.add_argument("--db", default="/tmp/bulk_users_bench.db")
+    args = parser.parse_args()
+    # Utilisateur 1 conservé (l'administrateur)
+    user_ids = list(range(2, args.users + 1))
+
+    db = fresh_session(args.db, args.users, args.predictions)
+    start = time.perf_counter()
+    for user_id in user_ids:
+        user = db.query(User).filter(User.id == user_id).first()
+        db.query(Prediction).filter(Prediction.user_id == user_id).delete()
+        db.delete(user)
+        db.commit()
+    elapsed = time.perf_counter() - start
+    print(f"avant : {len(user_ids)} suppressions unitaires      {elapsed:7.2f} s")
+    db.close()
+
+    db = fresh_session(args.db, args.users, args.predictions)
+    start = time.perf_counter()
+    apply_bulk_action(db, "deactivate", user_ids)
+    db.commit()
+    print(f"bulk  : désactivation de {len(user_ids)} comptes     {time.perf_counter() - start:7.2f} s")
+
+    start = time.perf_counter()
+    deleted = apply_bulk_action(db, "delete", user_ids)
+    db.commit()
+    print(f"bulk  : suppression de {len(deleted)} comptes        {time.perf_counter() - start:7.2f} s")
+
+    remaining = db.scalar(select(func.count()).select_from(Prediction))
+    print(f"prédictions restantes : {remaining}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Latence du moteur aplati (FlatForest) face à sklearn.
+
+Compare la latence mono-ligne et par lot des deux moteurs sur le CSV
+d'entraînement. La parité des probabilités (flat et mmap) est vérifiée par
+tests/test_engine_parity.py.
+
+Usage : python -m benchmarks.bench_engine [--repeat 300]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from ml.model_handler import model_handler
+from ml.tree_engine import FlatForest
+from schemas.prediction_schema import PredictionInput
+
+DATA_PATH = "data/ObesityDataSet_raw_and_data_sinthetic.csv"
+
+
+def load_inputs():
+    """Charger le CSV sous forme de PredictionInput"""
+    df = pd.read_csv(DATA_PATH).drop(columns="NObeyesdad")
+    df.columns = [col.lower() for col in df.columns]
+    return [PredictionInput(**row) for row in df.to_dict("records")]
+
+
+def measure(func, X: np.ndarray, repeat: int) -> np.ndarray:
+    """Mesurer la latence (en ms) de chaque appel"""
+    func(X)
+    timings = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(X)
+        timings[i] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    X = model_handler.preprocess_batch(load_inputs())
+    forest = FlatForest.from_sklearn(model_handler.model)
+
+    engines = {"sklearn": model_handler.model.predict_proba, "flat": forest.predict_proba}
+    for label, batch in (("1 ligne", X[:1]), (f"{len(X)} lignes", X)):
+        for name, predict_proba in engines.items():
+            timings = measure(predict_proba, batch, args.repeat if len(batch) == 1 else 20)
+            print(f"{label:12s} {name:8s} p50={np.percentile(timings, 50):8.3f} ms  "
+                  f"p99={np.percentile(timings, 99):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Mémoire de l'export en flux des prédictions.
+
+Remplit une base SQLite (mêmes données que bench_history), puis consomme
+l'export CSV (et Parquet si pyarrow est installé) de tout l'historique de
+l'utilisateur intensif pour des tailles croissantes. Le pic tracemalloc doit
+rester constant (borné par EXPORT_CHUNK_SIZE lignes) quand le nombre de lignes
+est multiplié, contrairement au chargement complet de la liste.
+
+Usage : python -m benchmarks.bench_export [--rows 1000000] [--db /tmp/export_bench.db]
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine, select
+
+from benchmarks.bench_history import seed
+from database.database import SessionLocal
+from database.models import Prediction
+from api.prediction_routes import HISTORY_FIELDS
+from utils.export import stream_csv, stream_parquet, parquet_available
+
+
+def measure(label: str, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    produced = f"  ({size / 2**20:.0f} Mo produits)" if size else ""
+    print(f"{label:<40} pic {peak / 2**20:7.1f} Mo  {elapsed:6.1f} s{produced}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", default="/tmp/export_bench.db")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    engine = create_engine(f"sqlite:///{args.db}")
+    # Toutes les lignes appartiennent à l'utilisateur exporté
+    seed(engine, args.rows, heavy_rows=args.rows)
+    SessionLocal.configure(bind=engine)
+
+    columns = list(HISTORY_FIELDS)
+    for rows in (args.rows // 10, args.rows):
+        query = (
+            select(*[getattr(Prediction, name) for name in columns])
+            .where(Prediction.user_id == 1)
+            .order_by(Prediction.created_at.desc(), Prediction.id.desc())
+            .limit(rows)
+        )
+        measure(f"CSV en flux, {rows} lignes",
+                lambda: sum(len(chunk) for chunk in stream_csv(SessionLocal, query, columns)))
+        if parquet_available():
+            measure(f"Parquet en flux, {rows} lignes",
+                    lambda: sum(len(chunk) for chunk in stream_parquet(SessionLocal, query, columns)))
+
+    # Référence : liste complète en mémoire (ancienne méthode), sur la petite taille
+    def materialize():
+        with SessionLocal() as db:
+            db.query(Prediction).filter(Prediction.user_id == 1).limit(args.rows // 10).all()
+        return 0
+    measure(f"liste complète (ORM), {args.rows // 10} lignes", materialize)
+
+
+if __name__ == "__main__":
+    main()
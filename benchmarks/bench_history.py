@@ -0,0 +1,130 @@
+"""
+Historique des prédictions : chargement complet vs pagination par curseur.
+
+Remplit une base SQLite de `--rows` prédictions (par défaut 1M), dont
+`--heavy-rows` pour un même utilisateur, puis mesure pour cet utilisateur :
+l'ancienne requête (toutes les colonnes, toutes les lignes), une page par
+OFFSET profond, et une page par curseur (created_at, id) complète ou projetée.
+Affiche aussi le plan de requête SQLite de la page par curseur.
+
+Usage : python -m benchmarks.bench_history [--rows 1000000] [--heavy-rows 50000] [--db /tmp/history.db]
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from database.models import Base, User, Prediction
+from api.prediction_routes import HISTORY_FIELDS
+
+CLASSES = ["Normal_Weight", "Overweight_Level_I", "Overweight_Level_II", "Obesity_Type_I",
+           "Obesity_Type_II", "Obesity_Type_III", "Insufficient_Weight"]
+PAGE_SIZE = 50
+CHUNK = 20000
+
+
+def seed(engine, rows: int, heavy_rows: int, users: int = 1000):
+    """Créer les tables et insérer les prédictions par blocs"""
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(0)
+    start_date = datetime(2024, 1, 1)
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x"}
+            for i in range(1, users + 1)
+        ])
+
+        for offset in range(0, rows, CHUNK):
+            batch = []
+            for n in range(offset, min(offset + CHUNK, rows)):
+                batch.append({
+                    # Utilisateur 1 = utilisateur intensif
+                    "user_id": 1 if n < heavy_rows else rng.randint(2, users),
+                    "gender": rng.choice(["Male", "Female"]), "age": rng.uniform(14, 61),
+                    "height": rng.uniform(1.45, 1.98), "weight": rng.uniform(39, 173),
+                    "family_history_with_overweight": "yes", "favc": "yes", "fcvc": 2.0, "ncp": 3.0,
+                    "caec": "Sometimes", "smoke": "no", "ch2o": 2.0, "scc": "no", "faf": 1.0, "tue": 1.0,
+                    "calc": "Sometimes", "mtrans": "Public_Transportation",
+                    "predicted_class": rng.choice(CLASSES), "confidence": rng.random(),
+                    "probabilities": {},
+                    "created_at": start_date + timedelta(seconds=rng.randint(0, 60 * 86400)),
+                })
+            conn.execute(insert(Prediction), batch)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def timed(label: str, func, repeat: int = 5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<42} {best * 1000:9.2f} ms  ({count} lignes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--heavy-rows", type=int, default=50_000)
+    parser.add_argument("--db", default="/tmp/history_bench.db")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    engine = create_engine(f"sqlite:///{args.db}")
+
+    start = time.perf_counter()
+    seed(engine, args.rows, args.heavy_rows)
+    print(f"{args.rows} prédictions insérées en {time.perf_counter() - start:.1f} s "
+          f"({args.heavy_rows} pour l'utilisateur intensif)\n")
+
+    order = (Prediction.created_at.desc(), Prediction.id.desc())
+    full_columns = [getattr(Prediction, name) for name in HISTORY_FIELDS]
+    projected = [Prediction.id, Prediction.created_at, Prediction.predicted_class,
+                 Prediction.confidence, Prediction.height, Prediction.weight]
+
+    with Session(engine) as db:
+        # Curseur positionné au milieu de l'historique (page profonde)
+        middle = db.execute(
+            select(Prediction.created_at, Prediction.id).where(Prediction.user_id == 1)
+            .order_by(*order).offset(args.heavy_rows // 2).limit(1)
+        ).one()
+
+        def keyset(columns):
+            return lambda: len(db.execute(
+                select(*columns).where(Prediction.user_id == 1)
+                .where(tuple_(Prediction.created_at, Prediction.id) < tuple_(*middle))
+                .order_by(*order).limit(PAGE_SIZE + 1)
+            ).all())
+
+        timed("avant : tout l'historique (ORM)", lambda: len(
+            db.query(Prediction).filter(Prediction.user_id == 1)
+            .order_by(Prediction.created_at.desc()).all()
+        ), repeat=2)
+        db.expunge_all()
+        timed("OFFSET profond, page de 50", lambda: len(db.execute(
+            select(*full_columns).where(Prediction.user_id == 1)
+            .order_by(*order).offset(args.heavy_rows // 2).limit(PAGE_SIZE)
+        ).all()))
+        timed("curseur profond, page de 50", keyset(full_columns))
+        timed("curseur profond, page de 50 projetée", keyset(projected))
+
+        plan = db.execute(text("EXPLAIN QUERY PLAN " + str(
+            select(*projected).where(Prediction.user_id == 1)
+            .where(tuple_(Prediction.created_at, Prediction.id) < tuple_(*middle))
+            .order_by(*order).limit(PAGE_SIZE + 1)
+            .compile(engine, compile_kwargs={"literal_binds": True})
+        ))).all()
+        print("\nPlan SQLite (page par curseur) :")
+        for row in plan:
+            print("  ", row[-1])
+
+
+if __name__ == "__main__":
+    main()
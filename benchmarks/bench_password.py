@@ -0,0 +1,56 @@
+"""
+Débit de connexions (vérifications bcrypt) par cœur.
+
+Mesure la vérification d'un mot de passe au coût BCRYPT_ROUNDS configuré :
+d'abord en série sur un thread, puis via le pool borné avec `--clients`
+appelants concurrents (les requêtes refusées par le pool sont comptées).
+
+Usage : BCRYPT_ROUNDS=12 python -m benchmarks.bench_password [--logins 40] [--clients 16]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from auth.jwt_handler import get_password_hash, verify_and_update_password
+from auth.password_pool import password_pool, PasswordPoolSaturated
+from config import settings
+
+PASSWORD = "benchmark-password"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--clients", type=int, default=16)
+    args = parser.parse_args()
+
+    hashed = get_password_hash(PASSWORD)
+    cores = os.cpu_count() or 1
+    print(f"bcrypt rounds={settings.BCRYPT_ROUNDS}  cœurs={cores}  "
+          f"pool={password_pool.max_workers} workers + {password_pool.max_pending} en attente")
+
+    start = time.perf_counter()
+    for _ in range(args.logins):
+        verify_and_update_password(PASSWORD, hashed)
+    serial = args.logins / (time.perf_counter() - start)
+    print(f"série       : {serial:6.1f} connexions/s (1 cœur)")
+
+    def login(_):
+        try:
+            password_pool.run(verify_and_update_password, PASSWORD, hashed)
+            return True
+        except PasswordPoolSaturated:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as clients:
+        accepted = sum(clients.map(login, range(args.logins)))
+    elapsed = time.perf_counter() - start
+    print(f"pool        : {accepted / elapsed:6.1f} connexions/s "
+          f"({accepted / elapsed / min(cores, password_pool.max_workers):.1f} par cœur), "
+          f"{args.logins - accepted} refusées (429)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark de ModelHandler.predict.
+
+Compare l'ancien chemin (model.predict + model.predict_proba + inverse_transform)
+au chemin actuel (un seul predict_proba, argmax, noms de classes en cache).
+
+Usage : python -m benchmarks.bench_predict [--repeat 500]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ml.model_handler import model_handler
+from schemas.prediction_schema import PredictionInput
+
+SAMPLE = PredictionInput(
+    gender="Female", age=21.0, height=1.62, weight=64.0,
+    family_history_with_overweight="yes", favc="no", fcvc=2.0, ncp=3.0,
+    caec="Sometimes", smoke="no", ch2o=2.0, scc="no", faf=0.0, tue=1.0,
+    calc="no", mtrans="Public_Transportation"
+)
+
+
+def legacy_predict(input_data: PredictionInput):
+    """Chemin de prédiction avant optimisation (deux parcours de la forêt)"""
+    X = model_handler.preprocess_input(input_data)
+    prediction = model_handler.model.predict(X)[0]
+    probabilities = model_handler.model.predict_proba(X)[0]
+    classes = model_handler.target_classes
+    predicted_class = classes[prediction]
+    prob_dict = {classes[i]: float(probabilities[i]) for i in range(len(classes))}
+    return {
+        "predicted_class": predicted_class,
+        "confidence": float(max(probabilities)),
+        "probabilities": prob_dict
+    }
+
+
+def measure(func, repeat: int) -> np.ndarray:
+    """Mesurer la latence (en ms) de chaque appel"""
+    func(SAMPLE)  # échauffement
+    timings = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(SAMPLE)
+        timings[i] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    # Mesurer le calcul lui-même, pas le cache des prédictions
+    model_handler.cache.maxsize = 0
+
+    assert legacy_predict(SAMPLE) == model_handler.predict(SAMPLE)
+
+    results = {
+        "legacy (predict + predict_proba)": measure(legacy_predict, args.repeat),
+        "current (predict_proba + argmax)": measure(model_handler.predict, args.repeat),
+    }
+    for name, timings in results.items():
+        print(f"{name:36s} p50={np.percentile(timings, 50):7.3f} ms  "
+              f"p99={np.percentile(timings, 99):7.3f} ms")
+
+    legacy, current = (np.median(t) for t in results.values())
+    print(f"speedup (p50): x{legacy / current:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Mémoire par worker selon le moteur d'inférence.
+
+Lance `--workers` processus qui chargent chacun ModelHandler (comme autant de
+workers uvicorn), font une prédiction puis relèvent leur RSS et leur PSS
+(/proc/self/smaps_rollup, Linux). Le PSS répartit les pages partagées entre
+les processus : en mode mmap, les tableaux de la forêt ne sont comptés
+qu'une fois pour l'ensemble des workers.
+
+Prérequis : python -m ml.train_model (publie forest/*.npy dans le registre)
+Usage : python -m benchmarks.bench_rss [--workers 4]
+"""
+import argparse
+import multiprocessing
+import os
+
+
+def read_memory_kb() -> dict:
+    """RSS et PSS du processus courant, en kB"""
+    memory = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                memory[key] = int(rest.split()[0])
+    return memory
+
+
+def worker(engine: str, ready, release, results):
+    """Charger le modèle, prédire, mesurer, puis attendre que tous aient mesuré"""
+    os.environ["INFERENCE_ENGINE"] = engine
+    from ml.model_handler import ModelHandler
+    from benchmarks.bench_predict import SAMPLE
+
+    handler = ModelHandler()
+    handler.predict(SAMPLE)
+    ready.wait()
+    results.put(read_memory_kb())
+    # Rester en vie pendant la mesure des autres workers (pages encore partagées)
+    release.wait()
+
+
+def run(engine: str, n_workers: int) -> list:
+    context = multiprocessing.get_context("spawn")
+    ready = context.Barrier(n_workers)
+    release = context.Event()
+    results = context.Queue()
+
+    processes = [
+        context.Process(target=worker, args=(engine, ready, release, results))
+        for _ in range(n_workers)
+    ]
+    for process in processes:
+        process.start()
+    measures = [results.get() for _ in processes]
+    release.set()
+    for process in processes:
+        process.join()
+    return measures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    for engine in ("sklearn", "flat", "mmap"):
+        measures = run(engine, args.workers)
+        rss = sum(m["Rss"] for m in measures) / len(measures) / 1024
+        pss = sum(m["Pss"] for m in measures) / len(measures) / 1024
+        print(f"{engine:8s} {args.workers} workers : RSS moyen={rss:7.1f} MB  PSS moyen={pss:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
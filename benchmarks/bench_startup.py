@@ -0,0 +1,74 @@
+"""
+Temps de démarrage de l'application, à partir de `python -X importtime`.
+
+Importe `app` dans un processus neuf (`--repeat` fois), relève le temps
+cumulé d'import d'`app` et les modules les plus coûteux, puis mesure le
+démarrage complet (lifespan : création des tables + chargement du modèle).
+Signale aussi si pandas / sklearn sont importés dès l'import d'`app`.
+
+Usage : python -m benchmarks.bench_startup [--repeat 5] [--top 10]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+from fastapi.testclient import TestClient
+from app import app
+imported = time.perf_counter()
+import sys
+heavy = [m for m in ("pandas", "sklearn") if m in sys.modules]
+with TestClient(app):
+    ready = time.perf_counter()
+print(f"{imported - start:.4f} {ready - imported:.4f} {','.join(heavy) or '-'}")
+"""
+
+
+def parse_importtime(stderr: str) -> dict:
+    """{module: (self_us, cumulative_us)} à partir de la sortie de -X importtime"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    import_times, runs = [], []
+    for _ in range(args.repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app"],
+            capture_output=True, text=True, check=True
+        )
+        modules = parse_importtime(result.stderr)
+        import_times.append(modules["app"][1] / 1e6)
+        runs.append(modules)
+
+    print(f"import app (importtime) : médiane={statistics.median(import_times):.3f} s "
+          f"sur {args.repeat} essais")
+
+    print(f"\nTop {args.top} des modules (temps propre, dernier essai) :")
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1][0], reverse=True)
+    for name, (self_us, cumulative_us) in slowest[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  (cumulé {cumulative_us / 1000:8.1f} ms)  {name}")
+
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT], capture_output=True, text=True, check=True
+    )
+    import_s, startup_s, heavy = result.stdout.split()[-3:]
+    print(f"\nimport app : {float(import_s):.3f} s   lifespan (tables + modèle) : "
+          f"{float(startup_s):.3f} s   pandas/sklearn à l'import : {heavy}")
+
+
+if __name__ == "__main__":
+    main()
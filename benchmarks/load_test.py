@@ -0,0 +1,99 @@
+"""
+Test de charge de POST /prediction/ contre un serveur en cours d'exécution.
+
+Crée (ou réutilise) un utilisateur, récupère un jeton puis lance `--clients`
+clients concurrents qui envoient chacun `--requests` prédictions. Les entrées
+sont tirées au hasard parmi les lignes du jeu d'entraînement, avec un bruit sur
+les features numériques : aucune n'est répétée, le cache des prédictions ne sert
+donc aucune réponse. Pour s'en assurer, lancer le serveur avec le cache
+désactivé. Affiche le débit et les latences p50/p95/p99.
+
+Usage :
+    PREDICTION_CACHE_SIZE=0 uvicorn app:app --port 8000 &
+    python -m benchmarks.load_test --url http://localhost:8000 --clients 200
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from ml.model_handler import CATEGORICAL_COLUMNS, FEATURE_COLUMNS
+
+USERNAME = "loadtest"
+PASSWORD = "loadtest-password"
+
+DATA_PATH = "data/ObesityDataSet_raw_and_data_sinthetic.csv"
+
+
+def make_payloads(n: int, seed: int) -> list:
+    """n entrées réalistes et distinctes : lignes du CSV tirées au hasard, features numériques bruitées"""
+    rng = np.random.default_rng(seed)
+    df = pd.read_csv(DATA_PATH)
+    rows = df.iloc[rng.integers(0, len(df), size=n)].reset_index(drop=True)
+    for col in FEATURE_COLUMNS:
+        if col not in CATEGORICAL_COLUMNS:
+            values = rows[col].to_numpy(dtype=np.float64)
+            # Bruit de ±1 % : mêmes ordres de grandeur, valeurs jamais répétées
+            rows[col] = values * (1 + rng.uniform(-0.01, 0.01, size=n))
+    return [
+        {col.lower(): (row[col] if col in CATEGORICAL_COLUMNS else float(row[col])) for col in FEATURE_COLUMNS}
+        for row in rows.to_dict("records")
+    ]
+
+
+async def get_token(client: httpx.AsyncClient) -> str:
+    """Enregistrer l'utilisateur de test si besoin et se connecter"""
+    await client.post("/auth/register", json={
+        "username": USERNAME, "email": f"{USERNAME}@example.com",
+        "password": PASSWORD, "confirm_password": PASSWORD
+    })
+    response = await client.post("/auth/login", json={"username": USERNAME, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_client(client: httpx.AsyncClient, headers: dict, payloads: list,
+                     latencies: list, errors: list):
+    """Envoyer les prédictions du client l'une après l'autre"""
+    for payload in payloads:
+        start = time.perf_counter()
+        response = await client.post("/prediction/", json=payload, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=10, help="requêtes par client")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.clients * args.requests, args.seed)
+
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120) as client:
+        headers = {"Authorization": f"Bearer {await get_token(client)}"}
+
+        latencies, errors = [], []
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            run_client(client, headers, payloads[i * args.requests:(i + 1) * args.requests], latencies, errors)
+            for i in range(args.clients)
+        ))
+        elapsed = time.perf_counter() - start
+
+    timings = np.array(latencies)
+    print(f"{len(timings)} requêtes, {args.clients} clients, {len(errors)} erreurs")
+    print(f"débit : {len(timings) / elapsed:.1f} req/s")
+    print(f"latence : p50={np.percentile(timings, 50):.1f} ms  "
+          f"p95={np.percentile(timings, 95):.1f} ms  p99={np.percentile(timings, 99):.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,16 +1,18 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 import os
 import tempfile
 
 from app import app
-from database.database import get_db, Base
-from database.models import User, Prediction
+from database.database import get_db, get_session_factory, enable_sqlite_foreign_keys
+# Les tables sont déclarées sur le Base de database.models
+from database.models import Base, User, Prediction
 # from auth.password_utils import hash_password
 from auth.jwt_handler import create_access_token
+from auth.user_cache import user_cache
 import bcrypt
 
 def hash_password(password: str) -> str:
@@ -25,6 +27,7 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+event.listen(engine, "connect", enable_sqlite_foreign_keys)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 @pytest.fixture(scope="session")
@@ -48,7 +51,12 @@ def db_session(db_engine):
     connection.close()
 
 @pytest.fixture
-def client(db_session):
+def session_factory(db_session):
+    """Sessions sur la connexion du test (voient ses données non validées)"""
+    return sessionmaker(autocommit=False, autoflush=False, bind=db_session.bind)
+
+@pytest.fixture
+def client(db_session, session_factory):
     """Créer un client de test FastAPI"""
     def override_get_db():
         try:
@@ -57,6 +65,9 @@ def client(db_session):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    # Les utilisateurs de test sont recréés (nouvel id) à chaque test
+    user_cache.clear()
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -96,12 +107,12 @@ def test_admin_user(db_session):
 @pytest.fixture
 def user_token(test_user):
     """Créer un token JWT pour l'utilisateur de test"""
-    return create_access_token(data={"sub": test_user.username})
+    return create_access_token(data={"sub": test_user.username, "uid": test_user.id})
 
 @pytest.fixture
 def admin_token(test_admin_user):
     """Créer un token JWT pour l'admin de test"""
-    return create_access_token(data={"sub": test_admin_user.username})
+    return create_access_token(data={"sub": test_admin_user.username, "uid": test_admin_user.id})
 
 @pytest.fixture
 def auth_headers(user_token):
@@ -142,11 +153,40 @@ def test_prediction(db_session, test_user, sample_prediction_data):
         "user_id": test_user.id,
         "predicted_class": "Normal_Weight",
         "confidence": 0.85,
-        "probabilities": '{"Normal_Weight": 0.85, "Overweight_Level_I": 0.15}',
+        "probabilities": {"Normal_Weight": 0.85, "Overweight_Level_I": 0.15},
         **sample_prediction_data
     }
     prediction = Prediction(**prediction_data)
     db_session.add(prediction)
     db_session.commit()
     db_session.refresh(prediction)
-    return prediction
\ No newline at end of file
+    return prediction
+
+# Jeu d'entraînement versionné dans le dépôt
+DATA_PATH = "data/ObesityDataSet_raw_and_data_sinthetic.csv"
+
+@pytest.fixture(scope="session")
+def trained_model_dir(tmp_path_factory):
+    """Entraîner une fois un modèle (paramètres par défaut, sans recherche ni comparaison)"""
+    from ml.train_model import train_obesity_model
+    output_dir = tmp_path_factory.mktemp("model")
+    train_obesity_model(
+        data_path=DATA_PATH, output_dir=str(output_dir), search=False, compare_models=False
+    )
+    return output_dir
+
+@pytest.fixture
+def load_test_model(trained_model_dir, tmp_path, monkeypatch):
+    """Publier le modèle entraîné dans un registre temporaire ; load(engine) le charge"""
+    from config import settings
+    from ml.model_handler import LoadedModel
+    from ml.registry import model_registry
+    
+    monkeypatch.setattr(model_registry, "root", str(tmp_path / "registry"))
+    model_registry.publish(str(trained_model_dir))
+    
+    def load(engine: str = "sklearn") -> LoadedModel:
+        monkeypatch.setattr(settings, "INFERENCE_ENGINE", engine)
+        return LoadedModel.from_files()
+    
+    return load
@@ -1,9 +1,38 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from config import settings
+from database.pool_metrics import InstrumentedQueuePool
 
-engine = create_engine(settings.DATABASE_URL)
+def engine_options(database_url: str) -> dict:
+    """Options du pool de connexions, issues de settings"""
+    url = make_url(database_url)
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    # SQLite en mémoire utilise un pool à connexion unique : pas de dimensionnement
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+    options.update({
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    })
+    return options
+
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite n'applique les clés étrangères (et ON DELETE CASCADE) que sur demande"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", enable_sqlite_foreign_keys)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -16,7 +45,22 @@ def get_db():
     finally:
         db.close()
 
+def get_session_factory():
+    """
+    Dependency pour le travail qui survit à la route (réponses en flux) : il
+    ouvre et ferme sa propre session au lieu d'utiliser celle de get_db
+    """
+    return SessionLocal
+
 def create_tables():
     """Créer les tables en base de données"""
     from database.models import Base
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    from database.migrations import run_migrations
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    
+    # create_all ignore les index des tables déjà existantes
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
@@ -0,0 +1,92 @@
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+
+def migrate_probabilities_to_json(engine: Engine):
+    """
+    predictions.probabilities : texte JSON (json.dumps) -> colonne JSON native.
+
+    Postgres : conversion en place en JSONB. SQLite stocke le type JSON en texte,
+    les lignes existantes sont donc déjà lisibles sans conversion.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+
+    columns = {column["name"]: column for column in inspect(engine).get_columns("predictions")}
+    column = columns.get("probabilities")
+    if column is None or column["type"].__class__.__name__ == "JSONB":
+        return
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "ALTER TABLE predictions "
+            "ALTER COLUMN probabilities TYPE JSONB USING probabilities::jsonb"
+        ))
+    print("Migration: predictions.probabilities convertie en JSONB")
+
+
+def cascade_prediction_user_fk(engine: Engine):
+    """
+    predictions.user_id : clé étrangère ON DELETE CASCADE.
+
+    Postgres : contrainte remplacée en place. SQLite ne sait pas modifier une
+    contrainte : la table est reconstruite (renommage, création, copie).
+    """
+    inspector = inspect(engine)
+    foreign_keys = [fk for fk in inspector.get_foreign_keys("predictions")
+                    if fk["constrained_columns"] == ["user_id"]]
+    if not foreign_keys or (foreign_keys[0].get("options") or {}).get("ondelete", "").upper() == "CASCADE":
+        return
+
+    if engine.dialect.name == "postgresql":
+        name = foreign_keys[0]["name"]
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"ALTER TABLE predictions DROP CONSTRAINT {name}, "
+                f"ADD CONSTRAINT {name} FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE"
+            ))
+    elif engine.dialect.name == "sqlite":
+        from database.models import Prediction
+
+        table = Prediction.__table__
+        columns = ", ".join(column["name"] for column in inspector.get_columns("predictions"))
+        with engine.begin() as conn:
+            # Les index de l'ancienne table portent les noms de ceux de la nouvelle
+            for index in inspector.get_indexes("predictions"):
+                conn.execute(text(f"DROP INDEX IF EXISTS {index['name']}"))
+            conn.execute(text("ALTER TABLE predictions RENAME TO predictions_old"))
+            table.create(conn)
+            conn.execute(text(f"INSERT INTO predictions ({columns}) SELECT {columns} FROM predictions_old"))
+            conn.execute(text("DROP TABLE predictions_old"))
+    else:
+        return
+    print("Migration: predictions.user_id en ON DELETE CASCADE")
+
+
+def backfill_prediction_rollups(engine: Engine):
+    """Remplir prediction_daily_rollups à sa création si des prédictions existent déjà"""
+    from database.models import Prediction, PredictionDailyRollup
+    from database.rollups import rebuild_rollups
+
+    with Session(engine) as db:
+        if db.scalar(select(PredictionDailyRollup.day).limit(1)) is not None:
+            return
+        if db.scalar(select(Prediction.id).limit(1)) is None:
+            return
+        rebuild_rollups(db)
+    print("Migration: prediction_daily_rollups remplie depuis predictions")
+
+
+# Migrations idempotentes, appliquées dans l'ordre après create_all
+MIGRATIONS = (
+    migrate_probabilities_to_json,
+    cascade_prediction_user_fk,
+    backfill_prediction_rollups,
+)
+
+
+def run_migrations(engine: Engine):
+    """Appliquer les migrations au schéma existant"""
+    for migration in MIGRATIONS:
+        migration(engine)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, Boolean, ForeignKey, Index, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -16,14 +17,16 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    # Relation avec les prédictions
-    predictions = relationship("Prediction", back_populates="user")
+    # Relation avec les prédictions : supprimées par la base (ON DELETE CASCADE),
+    # sans que l'ORM ne les charge
+    predictions = relationship("Prediction", back_populates="user", passive_deletes=True)
 
 class Prediction(Base):
     __tablename__ = "predictions"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Indexé par ix_predictions_user_created (user_id en tête)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Features d'entrée
     gender = Column(String)
@@ -46,9 +49,38 @@ class Prediction(Base):
     # Résultats de la prédiction
     predicted_class = Column(String, nullable=False)
     confidence = Column(Float, nullable=False)
-    probabilities = Column(String)  # JSON string des probabilités
+    # {classe: probabilité} ; JSONB sous Postgres (agrégeable en SQL), JSON texte sous SQLite
+    probabilities = Column(JSON().with_variant(JSONB(), "postgresql"))
     
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relation avec l'utilisateur
-    user = relationship("User", back_populates="predictions")
\ No newline at end of file
+    user = relationship("User", back_populates="predictions")
+    
+    __table_args__ = (
+        # Historique paginé par curseur (user_id, created_at DESC, id DESC) :
+        # chaque page est un parcours d'index borné, sans tri
+        Index(
+            "ix_predictions_user_created",
+            "user_id", created_at.desc(), id.desc()
+        ),
+    )
+
+class PredictionDailyRollup(Base):
+    """
+    Agrégats des prédictions par jour, classe prédite et genre.
+
+    Maintenus dans la même transaction que l'insertion des prédictions
+    (database/rollups.py) : les tableaux de bord lisent ces quelques lignes
+    au lieu de parcourir la table predictions.
+    """
+    __tablename__ = "prediction_daily_rollups"
+    
+    day = Column(Date, primary_key=True)
+    predicted_class = Column(String, primary_key=True)
+    gender = Column(String, primary_key=True)
+    
+    prediction_count = Column(Integer, nullable=False, default=0)
+    # Sommes plutôt que moyennes : les incréments s'additionnent
+    confidence_sum = Column(Float, nullable=False, default=0.0)
+    bmi_sum = Column(Float, nullable=False, default=0.0)
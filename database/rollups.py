@@ -0,0 +1,149 @@
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import and_, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database.models import Prediction, PredictionDailyRollup
+
+RollupKey = Tuple[date, str, str]
+KEY_COLUMNS = ("day", "predicted_class", "gender")
+
+
+def _dialect_insert(db: Session):
+    """INSERT ... ON CONFLICT du dialecte courant (Postgres et SQLite), None pour les autres"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(PredictionDailyRollup)
+
+
+def _apply_row_by_row(db: Session, rows: List[Dict]):
+    """
+    Repli sans upsert natif : UPDATE relatif de chaque clé (atomique, pas de
+    mise à jour perdue), INSERT si elle n'existe pas encore. Une clé insérée
+    entre-temps par une transaction concurrente est rattrapée par un nouvel UPDATE.
+    """
+    rollup = PredictionDailyRollup
+    for row in rows:
+        increment = (
+            update(rollup)
+            .where(and_(*(getattr(rollup, column) == row[column] for column in KEY_COLUMNS)))
+            .values(
+                prediction_count=rollup.prediction_count + row["prediction_count"],
+                confidence_sum=rollup.confidence_sum + row["confidence_sum"],
+                bmi_sum=rollup.bmi_sum + row["bmi_sum"],
+            )
+        )
+        if db.execute(increment).rowcount:
+            continue
+        try:
+            with db.begin_nested():
+                db.execute(insert(rollup).values(**row))
+        except IntegrityError:
+            db.execute(increment)
+
+
+def aggregate(predictions: Iterable[Dict]) -> Dict[RollupKey, list]:
+    """Regrouper des prédictions (dicts de colonnes) en [count, somme confiance, somme IMC] par clé"""
+    increments: Dict[RollupKey, list] = defaultdict(lambda: [0, 0.0, 0.0])
+    for prediction in predictions:
+        key = (prediction["created_at"].date(), prediction["predicted_class"], prediction["gender"])
+        increment = increments[key]
+        increment[0] += 1
+        increment[1] += prediction["confidence"]
+        increment[2] += prediction["weight"] / (prediction["height"] ** 2)
+    return increments
+
+
+def apply_increments(db: Session, increments: Dict[RollupKey, list]):
+    """
+    Ajouter les incréments aux rollups en un seul upsert multi-lignes.
+
+    Une clé n'apparaît qu'une fois par instruction (exigence de ON CONFLICT
+    sous Postgres) puisque les incréments sont déjà regroupés. Les lignes sont
+    triées par clé : deux transactions concurrentes verrouillent les lignes de
+    rollup dans le même ordre et ne peuvent pas s'interbloquer sous Postgres.
+    Les autres dialectes passent par un repli clé par clé, dans le même ordre.
+    """
+    if not increments:
+        return
+
+    rows = [
+        {
+            "day": day, "predicted_class": predicted_class, "gender": gender,
+            "prediction_count": count, "confidence_sum": confidence_sum, "bmi_sum": bmi_sum,
+        }
+        for (day, predicted_class, gender), (count, confidence_sum, bmi_sum) in sorted(increments.items())
+    ]
+    upsert = _dialect_insert(db)
+    if upsert is None:
+        _apply_row_by_row(db, rows)
+        return
+
+    statement = upsert.values(rows)
+    rollup = PredictionDailyRollup
+    db.execute(statement.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={
+            "prediction_count": rollup.prediction_count + statement.excluded.prediction_count,
+            "confidence_sum": rollup.confidence_sum + statement.excluded.confidence_sum,
+            "bmi_sum": rollup.bmi_sum + statement.excluded.bmi_sum,
+        }
+    ))
+
+
+def add_predictions(db: Session, predictions: Iterable[Dict]):
+    """Comptabiliser des prédictions insérées (à appeler avant le commit de l'insertion)"""
+    apply_increments(db, aggregate(predictions))
+
+
+def _grouped_predictions():
+    """Agrégats SQL des prédictions, mêmes clés que les rollups"""
+    day = func.date(Prediction.created_at)
+    return select(
+        day,
+        Prediction.predicted_class,
+        Prediction.gender,
+        func.count(),
+        func.sum(Prediction.confidence),
+        func.sum(Prediction.weight / (Prediction.height * Prediction.height)),
+    ).group_by(day, Prediction.predicted_class, Prediction.gender)
+
+
+def remove_user_predictions(db: Session, user_ids: Iterable[int]):
+    """Retirer des rollups les prédictions d'utilisateurs sur le point d'être supprimées"""
+    rows = db.execute(_grouped_predictions().where(Prediction.user_id.in_(list(user_ids)))).all()
+    apply_increments(db, {
+        (date.fromisoformat(str(day)), predicted_class, gender): [-count, -confidence_sum, -bmi_sum]
+        for day, predicted_class, gender, count, confidence_sum, bmi_sum in rows
+    })
+    # Les clés vidées n'ont plus de sens
+    db.execute(delete(PredictionDailyRollup).where(PredictionDailyRollup.prediction_count <= 0))
+
+
+def rebuild_rollups(db: Session):
+    """Recalculer tous les rollups depuis la table predictions (remplissage initial, réparation)"""
+    db.execute(delete(PredictionDailyRollup))
+    db.execute(
+        insert(PredictionDailyRollup).from_select(
+            list(KEY_COLUMNS) + ["prediction_count", "confidence_sum", "bmi_sum"],
+            _grouped_predictions()
+        )
+    )
+    db.commit()
+
+
+if __name__ == "__main__":
+    from database.database import SessionLocal
+
+    with SessionLocal() as session:
+        rebuild_rollups(session)
+        total = session.scalar(select(func.coalesce(func.sum(PredictionDailyRollup.prediction_count), 0)))
+        print(f"Rollups reconstruits : {total} prédictions")
@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from config import settings
+from database.database import SessionLocal
+from database.models import Prediction
+from database.rollups import add_predictions
+
+
+class PredictionWriter:
+    """
+    Persistance différée (write-behind) des prédictions.
+
+    Les routes déposent les lignes déjà calculées dans une file bornée et
+    répondent sans attendre la base. Un thread de fond les insère par lots
+    (INSERT multi-lignes + incréments des rollups, une transaction par lot)
+    dès que `batch_size` lignes attendent ou que la plus ancienne a attendu
+    `flush_interval_ms`. À l'arrêt, la file est vidée avant de rendre la main.
+
+    Les lignes encore en file sont perdues si le processus est tué : le mode
+    "sync" (par défaut) reste le choix durable.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], max_queue: int,
+                 batch_size: int, flush_interval_ms: float):
+        self.session_factory = session_factory
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._pending: deque = deque()
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failed_rows = 0
+        self.rejected_rows = 0
+        self.total_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.last_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, rows: List[Dict]) -> bool:
+        """
+        Mettre des lignes en file. Renvoie False si l'écrivain est arrêté ou la
+        file pleine : l'appelant doit alors les enregistrer lui-même.
+        """
+        with self._condition:
+            if not self.running or self._stopping or len(self._pending) + len(rows) > self.max_queue:
+                self.rejected_rows += len(rows)
+                return False
+            was_empty = not self._pending
+            self._pending.extend(rows)
+            # Réveiller le thread à la première ligne (départ de l'échéance) et au lot complet
+            if was_empty or len(self._pending) >= self.batch_size:
+                self._condition.notify()
+        return True
+
+    def _next_batch(self) -> List[Dict]:
+        """Attendre un lot complet, l'échéance de la plus ancienne ligne, ou l'arrêt"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._pending or self._stopping)
+            self._condition.wait_for(
+                lambda: len(self._pending) >= self.batch_size or self._stopping,
+                timeout=self.flush_interval
+            )
+            count = min(len(self._pending), self.batch_size)
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _write(self, rows: List[Dict]) -> int:
+        """
+        Insérer un lot en une transaction. En cas d'échec, le lot est coupé en
+        deux et chaque moitié retentée : une ligne invalide (utilisateur supprimé
+        entre-temps...) n'emporte qu'elle-même, et une erreur transitoire est
+        retentée au passage. Renvoie le nombre de lignes abandonnées.
+        """
+        db = self.session_factory()
+        try:
+            db.execute(insert(Prediction), rows)
+            add_predictions(db, rows)
+            db.commit()
+            return 0
+        except Exception as e:
+            db.rollback()
+            if len(rows) == 1:
+                print(f"❌ Écriture différée d'une prédiction (user {rows[0]['user_id']}) échouée: {e}")
+                return 1
+        finally:
+            db.close()
+
+        middle = len(rows) // 2
+        return self._write(rows[:middle]) + self._write(rows[middle:])
+
+    def _flush(self, rows: List[Dict]):
+        start = time.perf_counter()
+        failed = self._write(rows)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flushes += 1
+        self.flushed_rows += len(rows) - failed
+        self.failed_rows += failed
+        self.total_flush_ms += elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.last_flush_ms = elapsed_ms
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+            elif self._stopping:
+                return
+
+    def start(self):
+        """Démarrer le thread d'écriture"""
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="prediction-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Vider la file puis arrêter le thread (bloquant)"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict:
+        """Profondeur de la file et latence des écritures"""
+        with self._condition:
+            queue_depth = len(self._pending)
+        return {
+            "mode": settings.PREDICTION_WRITE_MODE,
+            "running": self.running,
+            "queue_depth": queue_depth,
+            "max_queue": self.max_queue,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failed_rows": self.failed_rows,
+            "rejected_rows": self.rejected_rows,
+            "mean_flush_ms": self.total_flush_ms / self.flushes if self.flushes else 0.0,
+            "max_flush_ms": self.max_flush_ms,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+# Instance globale, démarrée par l'application si PREDICTION_WRITE_MODE = "write_behind"
+prediction_writer = PredictionWriter(
+    SessionLocal,
+    max_queue=settings.WRITE_BEHIND_QUEUE_SIZE,
+    batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval_ms=settings.WRITE_BEHIND_FLUSH_MS
+)
@@ -0,0 +1,144 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from ml.model_handler import ModelHandler, model_handler
+from schemas.prediction_schema import PredictionInput
+
+
+class PredictionBatcher:
+    """
+    Regroupe les prédictions concurrentes en micro-lots.
+
+    Chaque requête dépose son entrée dans une file et attend son futur. Une tâche
+    de fond attend au plus `max_wait_ms` après la première entrée (ou jusqu'à
+    `max_batch_size` entrées), score le lot comme une seule matrice dans un thread
+    dédié, puis résout le futur de chaque appelant. La boucle d'événements n'est
+    donc jamais bloquée par l'inférence.
+    """
+
+    def __init__(self, handler: ModelHandler, executor: ThreadPoolExecutor,
+                 max_batch_size: int, max_wait_ms: float):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._executor = executor
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Lot en cours de constitution ou de scoring (résolu ou annulé par close)
+        self._inflight: List[Tuple[PredictionInput, asyncio.Future]] = []
+
+    def _ensure_started(self):
+        """Démarrer la tâche de fond sur la boucle courante"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker is not None and not self._worker.done():
+            return
+
+        # Première utilisation, ou nouvelle boucle (par ex. un nouveau TestClient)
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._worker = loop.create_task(self._run())
+
+    async def predict(self, input_data: PredictionInput) -> Dict:
+        """Mettre une entrée en file et attendre son résultat"""
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((input_data, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[PredictionInput, asyncio.Future]]:
+        """Attendre une première entrée puis remplir le lot jusqu'au délai ou à la taille max"""
+        # Rempli en place : close() voit aussi un lot interrompu en cours de collecte
+        batch = self._inflight = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        """Boucle de la tâche de fond"""
+        while True:
+            batch = await self._collect()
+            inputs = [input_data for input_data, _ in batch]
+
+            try:
+                results = await self._loop.run_in_executor(
+                    self._executor, self.handler.predict_batch, inputs, True
+                )
+            except Exception:
+                # Une entrée invalide ne doit faire échouer que sa propre requête :
+                # le lot est rejoué entrée par entrée
+                results = await self._loop.run_in_executor(self._executor, self._predict_each, inputs)
+
+            for (_, future), result in zip(batch, results):
+                # L'appelant a pu être annulé (client déconnecté)
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self._inflight = []
+
+    def _predict_each(self, inputs: List[PredictionInput]) -> List:
+        """Scorer chaque entrée seule : son résultat, ou l'exception qu'elle lève"""
+        outcomes = []
+        for input_data in inputs:
+            try:
+                outcomes.append(self.handler.predict_batch([input_data], True)[0])
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
+    async def close(self):
+        """Arrêter la tâche de fond"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        # Ne laisser aucun appelant en attente indéfinie : lot interrompu puis file
+        for _, future in self._inflight:
+            future.cancel()
+        self._inflight = []
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
+
+
+# Pool borné dédié à l'inférence, séparé du pool de threads de Starlette (I/O base de données)
+inference_executor = ThreadPoolExecutor(
+    max_workers=settings.INFERENCE_WORKERS,
+    thread_name_prefix="inference"
+)
+
+
+async def run_inference(func: Callable, *args):
+    """Exécuter une fonction d'inférence dans le pool dédié sans bloquer la boucle"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor, func, *args)
+
+
+# Instance globale du regroupeur de prédictions
+prediction_batcher = PredictionBatcher(
+    model_handler,
+    inference_executor,
+    max_batch_size=settings.BATCH_MAX_SIZE,
+    max_wait_ms=settings.BATCH_MAX_WAIT_MS
+)
@@ -0,0 +1,119 @@
+import os
+import pickle
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Méthodes de compression joblib proposées par l'entraînement (lz4 si installé)
+COMPRESS_METHODS = ("zlib", "gzip", "bz2", "lzma", "lz4")
+
+
+def build_bundle(feature_columns: List[str], categorical_columns: List[str],
+                 label_encoders: Dict, scaler, model) -> Dict:
+    """
+    Assembler un Pipeline encodage -> normalisation -> modèle à partir des
+    préprocesseurs et du modèle déjà entraînés.
+
+    L'encodeur applique à chaque colonne catégorielle un OrdinalEncoder sur
+    les classes du LabelEncoder d'entraînement (mêmes codes), une colonne
+    par transformeur pour garder l'ordre des features vu par le scaler. Une
+    catégorie inconnue est codée 0, comme dans ModelHandler : l'OrdinalEncoder
+    refuse un code déjà attribué, elle est donc codée -1 puis remplacée par 0.
+    """
+    import pandas as pd
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline, make_pipeline
+    from sklearn.preprocessing import OrdinalEncoder
+
+    def categorical(col):
+        return make_pipeline(
+            OrdinalEncoder(
+                categories=[list(label_encoders[col].classes_)],
+                handle_unknown="use_encoded_value", unknown_value=-1, dtype=np.float64
+            ),
+            SimpleImputer(missing_values=-1.0, strategy="constant", fill_value=0.0)
+        )
+
+    encoder = ColumnTransformer(
+        [
+            (col, categorical(col), [col]) if col in categorical_columns else (col, "passthrough", [col])
+            for col in feature_columns
+        ],
+        verbose_feature_names_out=False
+    ).set_output(transform="pandas")
+
+    # L'OrdinalEncoder à catégories fixées n'apprend rien des données :
+    # un cadre qui parcourt les classes suffit à l'ajuster
+    rows = max(len(label_encoders[col].classes_) for col in categorical_columns)
+    frame = pd.DataFrame({
+        col: np.resize(label_encoders[col].classes_, rows) if col in categorical_columns else np.zeros(rows)
+        for col in feature_columns
+    })
+    encoder.fit(frame)
+
+    return {
+        "pipeline": Pipeline([("encoder", encoder), ("scaler", scaler), ("model", model)]),
+        # Le modèle prédit des codes : noms des classes dans l'ordre des codes
+        "target_classes": [str(name) for name in label_encoders["target"].classes_],
+    }
+
+
+def preprocessing_bundle(bundle: Dict) -> Dict:
+    """
+    Bundle sans le modèle (encodage + normalisation) : le moteur mmap lit la
+    forêt depuis les .npy et n'a pas à désérialiser l'estimateur
+    """
+    return {"pipeline": bundle["pipeline"][:-1], "target_classes": bundle["target_classes"]}
+
+
+def save_bundle(bundle: Dict, path: str, compress: int = 0, method: str = "zlib"):
+    """
+    Écrire le bundle. Sans compression, pickle protocole 5 (chargement le plus
+    rapide) ; sinon joblib avec la méthode et le niveau demandés.
+    """
+    with open(path + ".tmp", "wb") as f:
+        if compress:
+            import joblib
+            joblib.dump(bundle, f, compress=(method, compress))
+        else:
+            pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    # Même principe que FlatForest.save : remplacement atomique
+    os.replace(path + ".tmp", path)
+
+
+def load_bundle(path: str) -> Dict:
+    """Charger un bundle écrit par save_bundle (pickle brut ou joblib compressé)"""
+    with open(path, "rb") as f:
+        # Un pickle commence par l'opcode PROTO (0x80) ; joblib compressé par l'en-tête du compresseur
+        if f.read(1) == b"\x80":
+            f.seek(0)
+            return pickle.load(f)
+    import joblib
+    return joblib.load(path)
+
+
+def unpack_bundle(bundle: Dict, feature_columns: Optional[List[str]] = None):
+    """
+    (modèle, scaler, {colonne: catégories}, classes cibles) d'un bundle ;
+    modèle None pour un bundle de préprocessing seul. ValueError si l'ordre
+    des features diffère de `feature_columns`.
+    """
+    pipeline = bundle["pipeline"]
+    encoder = pipeline.named_steps["encoder"]
+
+    if feature_columns is not None and list(encoder.feature_names_in_) != list(feature_columns):
+        raise ValueError(f"Ordre des features du bundle inattendu: {list(encoder.feature_names_in_)}")
+
+    # Premier pas de chaque pipeline de colonne catégorielle : l'OrdinalEncoder
+    categories = {
+        columns[0]: np.asarray(transformer[0].categories_[0])
+        for _, transformer, columns in encoder.transformers_
+        if hasattr(transformer, "steps")
+    }
+    return (
+        pipeline.named_steps.get("model"),
+        pipeline.named_steps["scaler"],
+        categories,
+        np.asarray(bundle["target_classes"]),
+    )
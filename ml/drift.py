@@ -0,0 +1,286 @@
+import json
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Seuils usuels du Population Stability Index
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+# En dessous, les scores sont calculés mais le statut reste "insufficient_data"
+MIN_SAMPLES = 100
+
+# Nombre de quantiles (intervalles) des features numériques dans la référence
+BASELINE_BINS = 10
+# Taille de l'échantillon d'entraînement conservé par feature numérique (test KS)
+BASELINE_SAMPLE_SIZE = 2000
+
+# Nombre maximal de catégories distinctes comptées par colonne (mémoire bornée)
+MAX_CATEGORIES = 64
+OTHER_CATEGORY = "__other__"
+
+# Lissage des proportions nulles dans le PSI
+PSI_EPSILON = 1e-4
+
+
+def build_baseline(X, categorical_columns: Sequence[str], predicted_classes: Sequence[str],
+                   random_state: int = 42) -> Dict:
+    """
+    Référence de dérive écrite par l'entraînement, à partir des features brutes
+    (catégories en clair) et des classes prédites sur le jeu de test.
+
+    Features numériques : moyenne, écart-type, bornes des quantiles et
+    proportions par intervalle (PSI), échantillon trié (KS). Catégorielles et
+    classe prédite : proportions par modalité.
+    """
+    rng = np.random.default_rng(random_state)
+    baseline = {"n_samples": int(len(X)), "numeric": {}, "categorical": {}}
+
+    for col in X.columns:
+        if col in categorical_columns:
+            counts = X[col].astype(str).value_counts(normalize=True)
+            baseline["categorical"][col] = {"proportions": {str(k): float(v) for k, v in counts.items()}}
+            continue
+
+        values = X[col].to_numpy(dtype=np.float64)
+        # Bornes intérieures ; dédoublonnées pour les features quasi discrètes (FCVC, NCP...)
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, BASELINE_BINS + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+        sample = values if len(values) <= BASELINE_SAMPLE_SIZE else rng.choice(values, BASELINE_SAMPLE_SIZE, replace=False)
+        baseline["numeric"][col] = {
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "edges": edges.tolist(),
+            "proportions": (counts / counts.sum()).tolist(),
+            "sample": np.sort(sample).tolist(),
+        }
+
+    classes, counts = np.unique(np.asarray(predicted_classes).astype(str), return_counts=True)
+    baseline["predicted_class"] = {
+        "proportions": {str(name): float(count / counts.sum()) for name, count in zip(classes, counts)}
+    }
+    return baseline
+
+
+def save_baseline(baseline: Dict, path: str):
+    with open(path, "w") as f:
+        json.dump(baseline, f)
+
+
+def load_baseline(path: str) -> Optional[Dict]:
+    """Référence de dérive, None si le modèle n'en a pas (entraîné avant son introduction)"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population Stability Index entre deux distributions de proportions alignées"""
+    expected = np.clip(np.asarray(expected, dtype=np.float64), PSI_EPSILON, None)
+    actual = np.clip(np.asarray(actual, dtype=np.float64), PSI_EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def psi_status(score: float, samples: int) -> str:
+    if samples < MIN_SAMPLES:
+        return "insufficient_data"
+    if score >= PSI_SIGNIFICANT:
+        return "significant"
+    if score >= PSI_MODERATE:
+        return "moderate"
+    return "stable"
+
+
+def category_psi(baseline_proportions: Dict[str, float], counts: Counter) -> float:
+    """PSI sur l'union des modalités de référence et observées"""
+    total = sum(counts.values())
+    categories = sorted(set(baseline_proportions) | set(counts))
+    expected = [baseline_proportions.get(category, 0.0) for category in categories]
+    actual = [counts.get(category, 0) / total for category in categories]
+    return psi(expected, actual)
+
+
+class DriftMonitor:
+    """
+    Statistiques en flux des entrées servies et des classes prédites, en
+    mémoire constante, comparées à la référence du modèle actif.
+
+    Le chemin des requêtes ne fait qu'ajouter un tuple à un tampon sous
+    verrou. Le tampon est replié toutes les `buffer_size` observations en
+    une passe NumPy : moyenne et variance par fusion de Welford/Chan,
+    min/max, réservoir uniforme (algorithme R) pour le test KS, histogramme
+    sur les quantiles de la référence pour le PSI, comptes par catégorie
+    (au plus MAX_CATEGORIES modalités par colonne) et par classe prédite.
+    """
+
+    def __init__(self, feature_columns: Sequence[str], categorical_columns: Sequence[str],
+                 reservoir_size: int, buffer_size: int = 256, enabled: bool = True, seed: Optional[int] = None):
+        self.feature_columns = list(feature_columns)
+        self.numeric_columns = [col for col in feature_columns if col not in categorical_columns]
+        self.categorical_columns = [col for col in feature_columns if col in categorical_columns]
+        self._numeric_index = [self.feature_columns.index(col) for col in self.numeric_columns]
+        self._categorical_index = [self.feature_columns.index(col) for col in self.categorical_columns]
+        self.reservoir_size = reservoir_size
+        self.buffer_size = buffer_size
+        self.enabled = enabled
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self.reset(None)
+
+    def reset(self, baseline: Optional[Dict]):
+        """Repartir de zéro avec une nouvelle référence (nouveau modèle activé)"""
+        n_numeric = len(self.numeric_columns)
+        with self._lock:
+            self.baseline = baseline
+            self._buffer = []
+            self.count = 0
+            self._mean = np.zeros(n_numeric)
+            self._m2 = np.zeros(n_numeric)
+            self._min = np.full(n_numeric, np.inf)
+            self._max = np.full(n_numeric, -np.inf)
+            self._reservoir = np.empty((self.reservoir_size, n_numeric))
+            # Bornes des intervalles de la référence, None sans référence
+            self._edges = [
+                np.asarray(baseline["numeric"][col]["edges"]) if baseline and col in baseline["numeric"] else None
+                for col in self.numeric_columns
+            ]
+            self._histograms = [
+                np.zeros(len(edges) + 1, dtype=np.int64) if edges is not None else None
+                for edges in self._edges
+            ]
+            self._categories = {col: Counter() for col in self.categorical_columns}
+            self._classes = Counter()
+
+    def observe(self, values: tuple, predicted_class: str):
+        """Enregistrer une entrée (valeurs dans l'ordre de feature_columns) et sa classe prédite"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._buffer.append((values, predicted_class))
+            if len(self._buffer) >= self.buffer_size:
+                self._fold()
+
+    def observe_many(self, rows: List[tuple], predicted_classes: List[str]):
+        """Enregistrer un lot d'entrées en une seule prise du verrou"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._buffer.extend(zip(rows, predicted_classes))
+            if len(self._buffer) >= self.buffer_size:
+                self._fold()
+
+    def _fold(self):
+        """Replier le tampon dans les statistiques (appelant détenteur du verrou)"""
+        rows = self._buffer
+        if not rows:
+            return
+        self._buffer = []
+
+        numeric = np.array([[values[i] for i in self._numeric_index] for values, _ in rows], dtype=np.float64)
+        n_batch = len(numeric)
+        n_total = self.count + n_batch
+
+        # Fusion des moments de Chan et al. : (count, mean, M2) + lot
+        batch_mean = numeric.mean(axis=0)
+        batch_m2 = ((numeric - batch_mean) ** 2).sum(axis=0)
+        delta = batch_mean - self._mean
+        self._mean += delta * n_batch / n_total
+        self._m2 += batch_m2 + delta ** 2 * self.count * n_batch / n_total
+        np.minimum(self._min, numeric.min(axis=0), out=self._min)
+        np.maximum(self._max, numeric.max(axis=0), out=self._max)
+
+        # Algorithme R : la i-ème observation (1-indexée) remplace une case au hasard
+        # avec probabilité reservoir_size / i
+        positions = np.arange(self.count, n_total)
+        fill = positions < self.reservoir_size
+        self._reservoir[positions[fill]] = numeric[fill]
+        slots = (self._rng.random(n_batch) * (positions + 1)).astype(np.int64)
+        replace = ~fill & (slots < self.reservoir_size)
+        for slot, row in zip(slots[replace], numeric[replace]):
+            self._reservoir[slot] = row
+
+        for j, edges in enumerate(self._edges):
+            if edges is not None:
+                self._histograms[j] += np.bincount(
+                    np.searchsorted(edges, numeric[:, j], side="right"), minlength=len(edges) + 1
+                )
+
+        for col, i in zip(self.categorical_columns, self._categorical_index):
+            counter = self._categories[col]
+            for values, _ in rows:
+                value = str(values[i])
+                if value not in counter and len(counter) >= MAX_CATEGORIES:
+                    value = OTHER_CATEGORY
+                counter[value] += 1
+
+        self._classes.update(predicted_class for _, predicted_class in rows)
+        self.count = n_total
+
+    def report(self) -> Dict:
+        """Statistiques courantes et scores PSI/KS par rapport à la référence"""
+        from scipy.stats import ks_2samp
+
+        with self._lock:
+            self._fold()
+            count = self.count
+            mean, m2 = self._mean.copy(), self._m2.copy()
+            minimum, maximum = self._min.copy(), self._max.copy()
+            reservoir = self._reservoir[:min(count, self.reservoir_size)].copy()
+            histograms = [h.copy() if h is not None else None for h in self._histograms]
+            categories = {col: Counter(counter) for col, counter in self._categories.items()}
+            classes = Counter(self._classes)
+            baseline = self.baseline
+
+        features = {}
+        for j, col in enumerate(self.numeric_columns):
+            stats = {
+                "type": "numeric",
+                "mean": float(mean[j]) if count else None,
+                "std": float(np.sqrt(m2[j] / count)) if count else None,
+                "min": float(minimum[j]) if count else None,
+                "max": float(maximum[j]) if count else None,
+            }
+            reference = baseline["numeric"].get(col) if baseline else None
+            if reference is not None and count:
+                score = psi(reference["proportions"], histograms[j] / count)
+                ks = ks_2samp(reservoir[:, j], reference["sample"])
+                stats.update({
+                    "baseline_mean": reference["mean"],
+                    "baseline_std": reference["std"],
+                    "psi": score,
+                    "ks_statistic": float(ks.statistic),
+                    "ks_pvalue": float(ks.pvalue),
+                    "status": psi_status(score, count),
+                })
+            features[col] = stats
+
+        for col in self.categorical_columns:
+            stats = {"type": "categorical", "counts": dict(categories[col])}
+            reference = baseline["categorical"].get(col) if baseline else None
+            if reference is not None and count:
+                score = category_psi(reference["proportions"], categories[col])
+                stats.update({"psi": score, "status": psi_status(score, count)})
+            features[col] = stats
+
+        predicted_class = {"counts": dict(classes)}
+        if baseline and count:
+            score = category_psi(baseline["predicted_class"]["proportions"], classes)
+            predicted_class.update({"psi": score, "status": psi_status(score, count)})
+
+        scores = {col: stats["psi"] for col, stats in features.items() if "psi" in stats}
+        return {
+            "enabled": self.enabled,
+            "samples": count,
+            "baseline_samples": baseline["n_samples"] if baseline else None,
+            "max_psi": max(scores.values()) if scores else None,
+            "drifted_features": sorted(
+                col for col, stats in features.items()
+                if stats.get("status") in ("moderate", "significant")
+            ),
+            "features": features,
+            "predicted_class": predicted_class,
+        }
@@ -1,123 +1,428 @@
+import os
 import pickle
-import pandas as pd
+import threading
 import numpy as np
 from typing import Dict, List
 from config import settings
 from schemas.prediction_schema import PredictionInput
+from ml.bundle import load_bundle, unpack_bundle
+from ml.drift import DriftMonitor, load_baseline
+from ml.registry import file_digest, model_registry
+from ml.tree_engine import FlatForest
+from utils.cache import TTLCache
+
+# Ordre des colonnes tel que vu par le scaler et le modèle à l'entraînement
+FEATURE_COLUMNS = [
+    'Gender', 'Age', 'Height', 'Weight', 'family_history_with_overweight',
+    'FAVC', 'FCVC', 'NCP', 'CAEC', 'SMOKE', 'CH2O', 'SCC', 'FAF', 'TUE',
+    'CALC', 'MTRANS'
+]
+
+CATEGORICAL_COLUMNS = [
+    'Gender', 'family_history_with_overweight', 'FAVC', 'CAEC',
+    'SMOKE', 'SCC', 'CALC', 'MTRANS'
+]
+
+# Jeu de validation minimal exécuté sur tout nouveau modèle avant de l'activer
+SMOKE_INPUTS = [
+    PredictionInput(
+        gender="Female", age=21.0, height=1.62, weight=64.0,
+        family_history_with_overweight="yes", favc="no", fcvc=2.0, ncp=3.0,
+        caec="Sometimes", smoke="no", ch2o=2.0, scc="no", faf=0.0, tue=1.0,
+        calc="no", mtrans="Public_Transportation"
+    ),
+    PredictionInput(
+        gender="Male", age=27.0, height=1.80, weight=87.0,
+        family_history_with_overweight="no", favc="yes", fcvc=3.0, ncp=3.0,
+        caec="Frequently", smoke="no", ch2o=2.0, scc="no", faf=2.0, tue=0.0,
+        calc="Frequently", mtrans="Walking"
+    ),
+    PredictionInput(
+        gender="Male", age=41.0, height=1.75, weight=130.0,
+        family_history_with_overweight="yes", favc="yes", fcvc=2.0, ncp=1.0,
+        caec="Always", smoke="yes", ch2o=1.0, scc="yes", faf=0.0, tue=2.0,
+        calc="Always", mtrans="Automobile"
+    ),
+]
+
+class LoadedModel:
+    """
+    Un jeu d'artefacts (modèle, scaler, catégories) chargé et compilé.
+    
+    Immuable une fois construit : une prédiction en cours garde la référence
+    vers l'instance avec laquelle elle a commencé, même si un autre modèle
+    est activé entre-temps.
+    """
+    
+    def __init__(self, model, engine, scaler, categories: Dict[str, np.ndarray],
+                 target_classes: np.ndarray, metadata, version: str, drift_baseline=None):
+        self.model = model
+        self.engine = engine
+        self.scaler = scaler
+        # Classes de chaque colonne catégorielle, dans l'ordre des codes
+        self.categories = categories
+        self.target_classes = target_classes
+        self.metadata = metadata
+        self.version = version
+        # Référence de dérive écrite par l'entraînement (None pour les anciens modèles)
+        self.drift_baseline = drift_baseline
+        self._compile_preprocessing()
+    
+    @classmethod
+    def from_files(cls) -> "LoadedModel":
+        """
+        Charger la version active du registre (sommes de contrôle revérifiées si
+        MODEL_VERIFY_ON_LOAD), ou les chemins historiques de settings si aucune
+        version n'est active
+        """
+        artifacts = model_registry.resolve()
+        if artifacts.version is not None and settings.MODEL_VERIFY_ON_LOAD:
+            model_registry.verify(artifacts.version)
+        
+        # La forêt est lue depuis les .npy en mmap (pages partagées entre
+        # workers). Sans répertoire forest (modèle qui n'est pas une forêt),
+        # le modèle est servi par sklearn
+        use_mmap = settings.INFERENCE_ENGINE == "mmap" and os.path.isdir(artifacts.forest_dir)
+        
+        if use_mmap and os.path.isfile(artifacts.preprocessing):
+            # Préprocesseurs seuls : l'estimateur sklearn n'est jamais désérialisé
+            model, scaler, categories, target_classes = unpack_bundle(
+                load_bundle(artifacts.preprocessing), FEATURE_COLUMNS
+            )
+        elif os.path.isfile(artifacts.pipeline):
+            # Bundle fusionné : un seul fichier, préprocesseurs et modèle toujours cohérents
+            model, scaler, categories, target_classes = unpack_bundle(
+                load_bundle(artifacts.pipeline), FEATURE_COLUMNS
+            )
+        else:
+            # Pickles séparés des modèles antérieurs au bundle ; en mmap,
+            # model.pkl n'est pas désérialisé
+            model = None
+            if not use_mmap:
+                with open(artifacts.model, "rb") as f:
+                    model = pickle.load(f)
+            
+            with open(artifacts.scaler, "rb") as f:
+                scaler = pickle.load(f)
+            
+            with open(artifacts.encoders, "rb") as f:
+                label_encoders = pickle.load(f)
+            categories = {
+                col: label_encoders[col].classes_
+                for col in CATEGORICAL_COLUMNS if col in label_encoders
+            }
+            target_classes = label_encoders['target'].classes_
+        
+        if use_mmap:
+            model = None
+            engine = FlatForest.load(artifacts.forest_dir, mmap_mode="r")
+        else:
+            engine = cls._build_engine(model)
+        
+        # Charger les métadonnées si disponibles
+        try:
+            with open(artifacts.metadata, "rb") as f:
+                metadata = pickle.load(f)
+        except FileNotFoundError:
+            metadata = {"model_name": "RandomForestClassifier"}
+        
+        return cls(
+            model=model,
+            engine=engine,
+            scaler=scaler,
+            categories=categories,
+            target_classes=target_classes,
+            metadata=metadata,
+            version=artifacts.version or file_digest(
+                artifacts.pipeline if os.path.isfile(artifacts.pipeline) else artifacts.model
+            )[:12],
+            drift_baseline=load_baseline(artifacts.drift_baseline)
+        )
+    
+    @staticmethod
+    def _build_engine(model):
+        """Choisir le moteur d'inférence selon settings.INFERENCE_ENGINE"""
+        if settings.INFERENCE_ENGINE in ("flat", "mmap"):
+            try:
+                return FlatForest.from_sklearn(model)
+            except ValueError as e:
+                print(f"⚠️ Moteur aplati indisponible, utilisation de sklearn: {e}")
+        return model
+    
+    def _compile_preprocessing(self):
+        """Compiler les catégories et le scaler en tables de correspondance et tableaux NumPy"""
+        # Une table {valeur: code} par colonne catégorielle, None pour les colonnes numériques
+        self.feature_plan = []
+        for col in FEATURE_COLUMNS:
+            table = None
+            if col in CATEGORICAL_COLUMNS and col in self.categories:
+                classes = self.categories[col]
+                table = {value: float(code) for code, value in enumerate(classes)}
+            self.feature_plan.append((col.lower(), table))
+        
+        self._scaler_mean = np.array(self.scaler.mean_, dtype=np.float64)
+        self._scaler_scale = np.array(self.scaler.scale_, dtype=np.float64)
+        
+        # Noms des classes dans l'ordre des colonnes de predict_proba
+        self.class_names = [str(name) for name in self.target_classes[self.engine.classes_]]
+    
+    def preprocess_input(self, input_data: PredictionInput) -> np.ndarray:
+        """Préprocesser les données d'entrée"""
+        X = np.empty((1, len(self.feature_plan)), dtype=np.float64)
+        row = X[0]
+        
+        for j, (attribute, table) in enumerate(self.feature_plan):
+            value = getattr(input_data, attribute)
+            if table is not None:
+                # Si la valeur n'est pas dans l'encodeur, utiliser la première classe
+                value = table.get(value, 0.0)
+            row[j] = value
+        
+        # Même calcul que StandardScaler.transform : (x - mean) / scale
+        X -= self._scaler_mean
+        X /= self._scaler_scale
+        
+        return X
+    
+    def preprocess_batch(self, inputs: List[PredictionInput]) -> np.ndarray:
+        """Préprocesser N entrées en une seule passe NumPy (sans DataFrame)"""
+        X = np.empty((len(inputs), len(self.feature_plan)), dtype=np.float64)
+        
+        for j, (attribute, table) in enumerate(self.feature_plan):
+            values = [getattr(item, attribute) for item in inputs]
+            if table is not None:
+                values = [table.get(value, 0.0) for value in values]
+            X[:, j] = values
+        
+        X -= self._scaler_mean
+        X /= self._scaler_scale
+        
+        return X
+    
+    def build_result(self, probabilities: np.ndarray, index: int) -> Dict:
+        """Construire la réponse à partir d'un vecteur de probabilités"""
+        return {
+            "predicted_class": self.class_names[index],
+            "confidence": float(probabilities[index]),
+            "probabilities": dict(zip(self.class_names, probabilities.tolist()))
+        }
+    
+    def cache_key(self, input_data: PredictionInput) -> tuple:
+        """Clé canonique : version du modèle + valeurs des features dans l'ordre fixe"""
+        return (self.version,) + tuple(
+            getattr(input_data, attribute) for attribute, _ in self.feature_plan
+        )
+    
+    def predict(self, input_data: PredictionInput) -> Dict:
+        """Scorer une entrée"""
+        X = self.preprocess_input(input_data)
+        
+        # Un seul parcours de la forêt : la classe prédite est l'argmax des probabilités
+        probabilities = self.engine.predict_proba(X)[0]
+        
+        return self.build_result(probabilities, int(probabilities.argmax()))
+    
+    def score_batch(self, inputs: List[PredictionInput]) -> List[Dict]:
+        """Scorer un lot en une seule matrice"""
+        X = self.preprocess_batch(inputs)
+        probabilities = self.engine.predict_proba(X)
+        indices = probabilities.argmax(axis=1)
+        
+        return [
+            self.build_result(row, index)
+            for row, index in zip(probabilities, indices.tolist())
+        ]
+    
+    def validate(self):
+        """Vérifier le modèle sur SMOKE_INPUTS, lever ValueError s'il est inutilisable"""
+        X = self.preprocess_batch(SMOKE_INPUTS)
+        probabilities = np.asarray(self.engine.predict_proba(X))
+        
+        if probabilities.shape != (len(SMOKE_INPUTS), len(self.class_names)):
+            raise ValueError(f"Forme de predict_proba inattendue: {probabilities.shape}")
+        if not np.isfinite(probabilities).all():
+            raise ValueError("Probabilités non finies")
+        if not np.allclose(probabilities.sum(axis=1), 1.0):
+            raise ValueError("Les probabilités ne somment pas à 1")
 
 class ModelHandler:
+    """
+    Gestionnaire du modèle actif.
+    
+    Le chargement est paresseux : rien n'est désérialisé à l'import. Le modèle
+    est chargé par le hook de démarrage de l'application (load_model), ou à la
+    première prédiction à défaut.
+    """
+    
     def __init__(self):
-        self.model = None
-        self.scaler = None
-        self.label_encoders = None
-        self.metadata = None
-        self.load_model()
+        self._active = None
+        self._reload_lock = threading.Lock()
+        self.load_error = None
+        self.cache = TTLCache(
+            maxsize=settings.PREDICTION_CACHE_SIZE,
+            ttl=settings.PREDICTION_CACHE_TTL
+        )
+        self.drift = DriftMonitor(
+            FEATURE_COLUMNS, CATEGORICAL_COLUMNS,
+            reservoir_size=settings.DRIFT_RESERVOIR_SIZE,
+            enabled=settings.DRIFT_MONITORING
+        )
+    
+    # Accès au modèle actif (None tant qu'aucun modèle n'est chargé)
+    @property
+    def model(self):
+        return self._active.model if self._active else None
+    
+    @property
+    def engine(self):
+        return self._active.engine if self._active else None
+    
+    @property
+    def scaler(self):
+        return self._active.scaler if self._active else None
+    
+    @property
+    def target_classes(self):
+        return self._active.target_classes if self._active else None
+    
+    @property
+    def metadata(self):
+        return self._active.metadata if self._active else None
+    
+    @property
+    def model_version(self):
+        return self._active.version if self._active else None
+    
+    @property
+    def is_ready(self) -> bool:
+        """Un modèle est chargé et peut servir des prédictions"""
+        return self._active is not None
     
     def load_model(self):
         """Charger le modèle et les préprocesseurs"""
+        with self._reload_lock:
+            self._load()
+    
+    def _load(self):
+        """Charger et activer le modèle (appelant détenteur de _reload_lock)"""
         try:
-            with open(settings.MODEL_PATH, "rb") as f:
-                self.model = pickle.load(f)
-            
-            with open(settings.SCALER_PATH, "rb") as f:
-                self.scaler = pickle.load(f)
-            
-            with open(settings.ENCODERS_PATH, "rb") as f:
-                self.label_encoders = pickle.load(f)
-            
-            # Charger les métadonnées si disponibles
-            try:
-                with open("../../models/metadata.pkl", "rb") as f:
-                    self.metadata = pickle.load(f)
-            except FileNotFoundError:
-                self.metadata = {"model_name": "RandomForestClassifier"}
-            
+            self._activate(LoadedModel.from_files())
+            self.load_error = None
             print("✅ Modèle chargé avec succès!")
             
         except FileNotFoundError as e:
             print(f"❌ Erreur lors du chargement du modèle: {e}")
+            self.load_error = str(e)
             raise Exception("Modèle non trouvé. Veuillez d'abord entraîner le modèle.")
+        except ValueError as e:
+            # Version du registre altérée : ne pas la servir
+            print(f"❌ Erreur lors du chargement du modèle: {e}")
+            self.load_error = str(e)
+            raise
     
-    def preprocess_input(self, input_data: PredictionInput) -> np.ndarray:
-        """Préprocesser les données d'entrée"""
-        # Convertir en DataFrame
-        data_dict = {
-            'Gender': input_data.gender,
-            'Age': input_data.age,
-            'Height': input_data.height,
-            'Weight': input_data.weight,
-            'family_history_with_overweight': input_data.family_history_with_overweight,
-            'FAVC': input_data.favc,
-            'FCVC': input_data.fcvc,
-            'NCP': input_data.ncp,
-            'CAEC': input_data.caec,
-            'SMOKE': input_data.smoke,
-            'CH2O': input_data.ch2o,
-            'SCC': input_data.scc,
-            'FAF': input_data.faf,
-            'TUE': input_data.tue,
-            'CALC': input_data.calc,
-            'MTRANS': input_data.mtrans
-        }
-        
-        df = pd.DataFrame([data_dict])
+    def _ensure_loaded(self) -> LoadedModel:
+        """Renvoyer le modèle actif, en le chargeant au premier appel si besoin"""
+        active = self._active
+        if active is None:
+            with self._reload_lock:
+                if self._active is None:
+                    self._load()
+                active = self._active
+        return active
+    
+    def reload_model(self) -> Dict:
+        """
+        Charger un nouveau jeu d'artefacts, le valider puis l'activer atomiquement.
         
-        # Encoder les variables catégorielles
-        categorical_columns = [
-            'Gender', 'family_history_with_overweight', 'FAVC', 'CAEC', 
-            'SMOKE', 'SCC', 'CALC', 'MTRANS'
-        ]
+        Les prédictions en cours terminent sur l'ancien modèle. En cas d'échec
+        (fichier manquant, validation), l'ancien modèle reste actif.
+        """
+        with self._reload_lock:
+            previous_version = self.model_version
+            candidate = LoadedModel.from_files()
+            candidate.validate()
+            self._activate(candidate)
         
-        for col in categorical_columns:
-            if col in self.label_encoders:
-                try:
-                    df[col] = self.label_encoders[col].transform(df[col])
-                except ValueError:
-                    # Si la valeur n'est pas dans l'encodeur, utiliser la première classe
-                    df[col] = 0
+        print(f"🔄 Modèle rechargé: {previous_version} -> {candidate.version}")
+        return {"previous_version": previous_version, "model_version": candidate.version}
+    
+    def _activate(self, loaded: LoadedModel):
+        """Basculer sur un modèle chargé (une seule affectation, atomique)"""
+        self._active = loaded
+        # Nouvelle version du modèle : les prédictions en cache ne sont plus valides
+        self.cache.clear()
+        # ni les statistiques de dérive, comparées à la référence de l'ancien modèle
+        self.drift.reset(loaded.drift_baseline)
+    
+    def preprocess_input(self, input_data: PredictionInput) -> np.ndarray:
+        """Préprocesser les données d'entrée"""
+        return self._ensure_loaded().preprocess_input(input_data)
+    
+    def preprocess_batch(self, inputs: List[PredictionInput]) -> np.ndarray:
+        """Préprocesser N entrées en une seule passe NumPy (sans DataFrame)"""
+        return self._ensure_loaded().preprocess_batch(inputs)
+    
+    def predict(self, input_data: PredictionInput) -> Dict:
+        """Faire une prédiction (les résultats en cache sont partagés, ne pas les modifier)"""
+        # Une seule lecture du modèle actif pour toute la prédiction
+        active = self._ensure_loaded()
         
-        # Normaliser avec le scaler
-        X_scaled = self.scaler.transform(df)
+        key = active.cache_key(input_data)
+        result = self.cache.get(key)
+        if result is None:
+            result = active.predict(input_data)
+            self.cache.set(key, result)
         
-        return X_scaled
+        # La clé contient déjà les valeurs des features, dans l'ordre de FEATURE_COLUMNS
+        self.drift.observe(key[1:], result["predicted_class"])
+        return result
     
-    def predict(self, input_data: PredictionInput) -> Dict:
-        """Faire une prédiction"""
-        if not self.model:
-            raise Exception("Modèle non chargé")
+    def predict_batch(self, inputs: List[PredictionInput], use_cache: bool = False) -> List[Dict]:
+        """Faire des prédictions pour un lot d'entrées"""
+        active = self._ensure_loaded()
         
-        # Préprocesser les données
-        X = self.preprocess_input(input_data)
+        if not inputs:
+            return []
         
-        # Prédiction
-        prediction = self.model.predict(X)[0]
-        probabilities = self.model.predict_proba(X)[0]
+        keys = [active.cache_key(item) for item in inputs]
         
-        # Décoder la prédiction
-        predicted_class = self.label_encoders['target'].inverse_transform([prediction])[0]
+        if not use_cache:
+            results = active.score_batch(inputs)
+            self._observe_batch(keys, results)
+            return results
         
-        # Créer le dictionnaire des probabilités
-        classes = self.label_encoders['target'].classes_
-        prob_dict = {classes[i]: float(probabilities[i]) for i in range(len(classes))}
+        # Ne scorer que les entrées absentes du cache
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
         
-        # Confiance = probabilité maximum
-        confidence = float(max(probabilities))
+        if missing:
+            scored = active.score_batch([inputs[i] for i in missing])
+            for i, result in zip(missing, scored):
+                results[i] = result
+                self.cache.set(keys[i], result)
         
-        return {
-            "predicted_class": predicted_class,
-            "confidence": confidence,
-            "probabilities": prob_dict
-        }
+        self._observe_batch(keys, results)
+        return results
+    
+    def _observe_batch(self, keys: List[tuple], results: List[Dict]):
+        """Transmettre un lot au suivi de dérive (valeurs = clés de cache sans la version)"""
+        self.drift.observe_many([key[1:] for key in keys], [result["predicted_class"] for result in results])
+    
+    def drift_report(self) -> Dict:
+        """Dérive des entrées et des classes prédites depuis l'activation du modèle"""
+        self._ensure_loaded()
+        return {"model_version": self.model_version, **self.drift.report()}
     
     def get_model_info(self) -> Dict:
         """Obtenir les informations du modèle"""
+        self._ensure_loaded()
         if self.metadata:
-            return self.metadata
+            return {**self.metadata, "model_version": self.model_version}
         else:
             return {
                 "model_name": "RandomForestClassifier",
                 "status": "loaded"
             }
 
-# Instance globale du gestionnaire de modèle
-model_handler = ModelHandler()
\ No newline at end of file
+# Instance globale du gestionnaire de modèle (chargé au démarrage de l'application)
+model_handler = ModelHandler()
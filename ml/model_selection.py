@@ -0,0 +1,147 @@
+import pickle
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+from sklearn.pipeline import make_pipeline
+
+from ml.tree_engine import FlatForest
+
+# Taille des lots pour la mesure de latence en batch (POST /prediction/batch)
+BATCH_ROWS = 256
+
+
+def candidate_estimators(base_forest: RandomForestClassifier, random_state: int) -> Dict:
+    """
+    Modèles comparés en précision et en coût d'inférence : la forêt retenue
+    par la recherche, des forêts plus petites ou élaguées, un gradient
+    boosting et une régression logistique.
+    """
+    def forest(**params):
+        return clone(base_forest).set_params(**params)
+
+    return {
+        "forest_selected": clone(base_forest),
+        "forest_50_depth10": forest(n_estimators=50, max_depth=10),
+        "forest_100_depth15": forest(n_estimators=100, max_depth=15),
+        # Élagage coût-complexité : moins de noeuds, parcours plus courts
+        "forest_pruned": forest(ccp_alpha=0.002),
+        "gradient_boosting": HistGradientBoostingClassifier(random_state=random_state),
+        "logistic_regression": LogisticRegression(max_iter=2000),
+    }
+
+
+def serving_engine(model, engine: str):
+    """Moteur tel que ModelHandler le construirait (forêt aplatie si possible)"""
+    if engine in ("flat", "mmap"):
+        try:
+            return FlatForest.from_sklearn(model)
+        except ValueError:
+            pass
+    return model
+
+
+def measure_latency(engine, X: np.ndarray, single_calls: int = 300, batch_calls: int = 30) -> Dict:
+    """p50/p99 de predict_proba sur une ligne et sur un lot de BATCH_ROWS lignes, en ms"""
+    def timed_calls(rows_for_call, calls: int) -> List[float]:
+        engine.predict_proba(rows_for_call(0))  # échauffement
+        timings = []
+        for i in range(calls):
+            rows = rows_for_call(i)
+            start = time.perf_counter()
+            engine.predict_proba(rows)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    single = timed_calls(lambda i: X[i % len(X)][np.newaxis, :], single_calls)
+    batch = timed_calls(lambda i: X[:BATCH_ROWS], batch_calls)
+
+    return {
+        "p50_single_ms": float(np.percentile(single, 50)),
+        "p99_single_ms": float(np.percentile(single, 99)),
+        "p50_batch_ms": float(np.percentile(batch, 50)),
+        "p99_batch_ms": float(np.percentile(batch, 99)),
+    }
+
+
+def evaluate_candidates(candidates: Dict, scaler, X_train, y_train, engine: str, n_jobs: int = -1,
+                        cv_folds: int = 5, random_state: int = 42) -> List[Dict]:
+    """
+    Mesurer pour chaque candidat la précision en validation croisée sur le jeu
+    d'entraînement, puis l'entraîner sur tout ce jeu et mesurer latence et
+    taille sérialisée. Le jeu de test n'intervient pas dans la sélection : il
+    reste réservé à l'évaluation finale du modèle retenu.
+    """
+    X_train_scaled = np.ascontiguousarray(scaler.transform(X_train), dtype=np.float64)
+    cv = StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=random_state)
+
+    records = []
+    for name, model in candidates.items():
+        parallel = "n_jobs" in model.get_params()
+        if parallel:
+            model.set_params(n_jobs=n_jobs)
+        # Normalisation réajustée sur chaque pli, comme dans la recherche
+        scores = cross_val_score(make_pipeline(clone(scaler), clone(model)), X_train, y_train, cv=cv)
+        start = time.perf_counter()
+        model.fit(X_train_scaled, y_train)
+        fit_seconds = time.perf_counter() - start
+        # Latence mesurée comme à l'inférence, sans pool joblib
+        if parallel:
+            model.set_params(n_jobs=None)
+
+        records.append({
+            "name": name,
+            "model": model,
+            "model_name": type(model).__name__,
+            "cv_accuracy": float(scores.mean()),
+            "cv_accuracy_std": float(scores.std()),
+            "size_bytes": len(pickle.dumps(model)),
+            "fit_seconds": fit_seconds,
+            **measure_latency(serving_engine(model, engine), X_train_scaled),
+        })
+        print(f"   {name:<22} précision CV {records[-1]['cv_accuracy']:.4f}  "
+              f"p99 ligne {records[-1]['p99_single_ms']:7.3f} ms  "
+              f"p99 lot {records[-1]['p99_batch_ms']:7.2f} ms  "
+              f"{records[-1]['size_bytes'] / 2**20:7.2f} Mo")
+    return records
+
+
+def pareto_frontier(records: List[Dict]) -> List[Dict]:
+    """
+    Candidats non dominés en (précision CV, p99 sur une ligne) : aucun autre n'est
+    à la fois au moins aussi précis et au moins aussi rapide, dont un strictement.
+    Triés du plus rapide au plus précis.
+    """
+    frontier = [
+        record for record in records
+        if not any(
+            other["cv_accuracy"] >= record["cv_accuracy"]
+            and other["p99_single_ms"] <= record["p99_single_ms"]
+            and (other["cv_accuracy"] > record["cv_accuracy"] or other["p99_single_ms"] < record["p99_single_ms"])
+            for other in records
+        )
+    ]
+    return sorted(frontier, key=lambda record: record["p99_single_ms"])
+
+
+def select_model(frontier: List[Dict], latency_budget_ms: Optional[float]) -> Dict:
+    """
+    Le plus précis de la frontière dont le p99 sur une ligne tient dans le budget,
+    le plus précis tout court sans budget, le plus rapide si aucun ne tient.
+    """
+    if latency_budget_ms is None:
+        return frontier[-1]
+    within_budget = [record for record in frontier if record["p99_single_ms"] <= latency_budget_ms]
+    if not within_budget:
+        print(f"⚠️ Aucun modèle sous {latency_budget_ms} ms au p99, choix du plus rapide")
+        return frontier[0]
+    return within_budget[-1]
+
+
+def summarize(record: Dict) -> Dict:
+    """Enregistrement sérialisable (sans l'estimateur)"""
+    return {key: value for key, value in record.items() if key != "model"}
@@ -0,0 +1,101 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from ml.model_handler import ModelHandler, model_handler
+from ml.registry import model_registry
+
+
+class ModelWatcher:
+    """
+    Surveille les fichiers du modèle et déclenche un rechargement à chaud.
+
+    Un thread de fond relève (mtime, taille) des artefacts toutes les
+    `interval` secondes. Un changement n'est pris en compte qu'une fois les
+    fichiers stables sur deux relevés consécutifs, pour ne pas recharger un
+    jeu d'artefacts en cours d'écriture par l'entraînement.
+    """
+
+    def __init__(self, handler: ModelHandler, paths: List[str], interval: float):
+        self.handler = handler
+        self.paths = paths
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _signature(self) -> Tuple:
+        """(mtime, taille) de chaque fichier surveillé, None si absent"""
+        signature = []
+        for path in self._watched_files():
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def _watched_files(self) -> List[str]:
+        """Fichiers surveillés (les répertoires sont développés en leurs fichiers)"""
+        files = []
+        for path in self.paths:
+            if os.path.isdir(path):
+                files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)))
+            else:
+                files.append(path)
+        return files
+
+    def _run(self):
+        loaded = self._signature()
+        pending: Optional[Tuple] = None
+
+        while not self._stop.wait(self.interval):
+            current = self._signature()
+            if current == loaded:
+                pending = None
+                continue
+            if current != pending:
+                # Changement détecté : attendre qu'il se stabilise
+                pending = current
+                continue
+
+            try:
+                self.handler.reload_model()
+            except Exception as e:
+                print(f"❌ Rechargement du modèle refusé: {e}")
+            # Ne pas réessayer en boucle le même jeu de fichiers invalide
+            loaded = current
+            pending = None
+
+    def start(self):
+        """Démarrer la surveillance en arrière-plan"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrêter la surveillance"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self._thread is not None and self._thread.is_alive(),
+            "interval_seconds": self.interval,
+        }
+
+
+# Instance globale de la surveillance des artefacts (démarrée si MODEL_WATCH_INTERVAL > 0)
+model_watcher = ModelWatcher(
+    model_handler,
+    # Le pointeur CURRENT du registre, puis les chemins historiques
+    paths=[
+        model_registry.pointer_path,
+        settings.PIPELINE_PATH, settings.MODEL_PATH, settings.SCALER_PATH, settings.ENCODERS_PATH, settings.FOREST_DIR
+    ],
+    interval=settings.MODEL_WATCH_INTERVAL
+)
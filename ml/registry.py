@@ -0,0 +1,329 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from config import settings
+
+# Fichiers d'une version, relatifs à son répertoire. Une version contient soit
+# le bundle fusionné (encodage + normalisation + modèle), soit les trois
+# pickles séparés des versions antérieures
+PIPELINE_FILE = "pipeline.joblib"
+# Encodage + normalisation sans le modèle, pour le moteur mmap (facultatif)
+PREPROCESSING_FILE = "preprocessing.joblib"
+MODEL_FILE = "model.pkl"
+SCALER_FILE = "scaler.pkl"
+ENCODERS_FILE = "label_encoders.pkl"
+METADATA_FILE = "metadata.pkl"
+DRIFT_BASELINE_FILE = "drift_baseline.json"
+FOREST_SUBDIR = "forest"
+MANIFEST_FILE = "manifest.json"
+
+# Pointeur vers la version active, à la racine du registre
+POINTER_FILE = "CURRENT"
+
+
+class ModelArtifacts:
+    """Chemins d'un jeu d'artefacts ; version None pour les chemins historiques de settings"""
+
+    def __init__(self, pipeline: str, preprocessing: str, model: str, scaler: str, encoders: str,
+                 metadata: str, forest_dir: str, drift_baseline: str, version: Optional[str] = None):
+        self.pipeline = pipeline
+        self.preprocessing = preprocessing
+        self.model = model
+        self.scaler = scaler
+        self.encoders = encoders
+        self.metadata = metadata
+        self.forest_dir = forest_dir
+        self.drift_baseline = drift_baseline
+        self.version = version
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 d'un fichier, lu par blocs"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Registre local des modèles : un répertoire immuable par version.
+
+        <root>/<version>/pipeline.joblib, preprocessing.joblib, metadata.pkl,
+                         drift_baseline.json, forest/*.npy, manifest.json
+        <root>/CURRENT   {"version": ..., "previous": ..., "activated_at": ...}
+
+    Une version est préparée dans un répertoire caché puis renommée : elle
+    apparaît complète ou pas du tout. Le manifeste porte le SHA-256 de chaque
+    fichier. Activer une version ou revenir à la précédente réécrit seulement
+    le pointeur CURRENT (fichier temporaire + os.replace), sans copier
+    d'artefacts ; les workers qui surveillent le pointeur rechargent seuls.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @property
+    def pointer_path(self) -> str:
+        return os.path.join(self.root, POINTER_FILE)
+
+    def version_dir(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def artifacts(self, version: str) -> ModelArtifacts:
+        """Chemins des artefacts d'une version"""
+        directory = self.version_dir(version)
+        return ModelArtifacts(
+            pipeline=os.path.join(directory, PIPELINE_FILE),
+            preprocessing=os.path.join(directory, PREPROCESSING_FILE),
+            model=os.path.join(directory, MODEL_FILE),
+            scaler=os.path.join(directory, SCALER_FILE),
+            encoders=os.path.join(directory, ENCODERS_FILE),
+            metadata=os.path.join(directory, METADATA_FILE),
+            forest_dir=os.path.join(directory, FOREST_SUBDIR),
+            drift_baseline=os.path.join(directory, DRIFT_BASELINE_FILE),
+            version=version
+        )
+
+    def pointer(self) -> Optional[Dict]:
+        """Contenu du pointeur CURRENT, None si aucune version n'est active"""
+        try:
+            with open(self.pointer_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def current(self) -> Optional[str]:
+        """Version active, None si le registre n'est pas utilisé"""
+        pointer = self.pointer()
+        return pointer["version"] if pointer else None
+
+    def versions(self) -> List[str]:
+        """Versions publiées, de la plus ancienne à la plus récente"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if not name.startswith(".")
+            and os.path.isfile(os.path.join(self.root, name, MANIFEST_FILE))
+        )
+
+    def manifest(self, version: str) -> Dict:
+        """Manifeste d'une version (FileNotFoundError si elle n'existe pas)"""
+        with open(os.path.join(self.version_dir(version), MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def resolve(self) -> ModelArtifacts:
+        """Artefacts de la version active, ou chemins historiques de settings sans registre"""
+        version = self.current()
+        if version is not None:
+            return self.artifacts(version)
+        return ModelArtifacts(
+            pipeline=settings.PIPELINE_PATH,
+            preprocessing=settings.PREPROCESSING_PATH,
+            model=settings.MODEL_PATH,
+            scaler=settings.SCALER_PATH,
+            encoders=settings.ENCODERS_PATH,
+            metadata=settings.METADATA_PATH,
+            forest_dir=settings.FOREST_DIR,
+            drift_baseline=settings.DRIFT_BASELINE_PATH
+        )
+
+    @staticmethod
+    def _checksums(directory: str) -> Dict[str, str]:
+        """SHA-256 de chaque fichier du répertoire (hors manifeste), chemins relatifs en /"""
+        checksums = {}
+        for base, _, names in os.walk(directory):
+            for name in names:
+                path = os.path.join(base, name)
+                relative = os.path.relpath(path, directory).replace(os.sep, "/")
+                if relative != MANIFEST_FILE:
+                    checksums[relative] = file_digest(path)
+        return dict(sorted(checksums.items()))
+
+    def staging_dir(self) -> str:
+        """
+        Répertoire caché où écrire une future version (même système de fichiers
+        que le registre). Un entraînement interrompu y laisse un .staging-*,
+        ignoré par versions()
+        """
+        os.makedirs(self.root, exist_ok=True)
+        return tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+
+    def publish(self, source_dir: str, activate: bool = True) -> str:
+        """
+        Publier un jeu d'artefacts comme nouvelle version et renvoyer son nom.
+
+        Un répertoire créé par staging_dir() est renommé en place ; tout autre
+        répertoire (par ex. l'ancien models/) est d'abord copié.
+        """
+        required = [METADATA_FILE]
+        if not os.path.isfile(os.path.join(source_dir, PIPELINE_FILE)):
+            required += [MODEL_FILE, SCALER_FILE, ENCODERS_FILE]
+        for name in required:
+            if not os.path.isfile(os.path.join(source_dir, name)):
+                raise FileNotFoundError(f"Artefact manquant: {os.path.join(source_dir, name)}")
+
+        root = os.path.abspath(self.root)
+        source = os.path.abspath(source_dir)
+        if os.path.dirname(source) == root and os.path.basename(source).startswith(".staging-"):
+            staging = source_dir
+        else:
+            staging = self.staging_dir()
+            # Un ancien models/ peut contenir le registre lui-même : ne pas le recopier
+            shutil.copytree(
+                source_dir, staging, dirs_exist_ok=True,
+                ignore=lambda directory, names: [
+                    name for name in names
+                    if os.path.abspath(os.path.join(directory, name)) == root
+                ]
+            )
+
+        checksums = self._checksums(staging)
+        created_at = datetime.now(timezone.utc)
+        model_digest = checksums.get(PIPELINE_FILE) or checksums[MODEL_FILE]
+        version = f"{created_at:%Y%m%dT%H%M%SZ}-{model_digest[:8]}"
+        suffix = 1
+        while os.path.exists(self.version_dir(version)):
+            suffix += 1
+            version = f"{created_at:%Y%m%dT%H%M%SZ}-{model_digest[:8]}-{suffix}"
+
+        with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+            json.dump({
+                "version": version,
+                "created_at": created_at.isoformat(),
+                "files": checksums,
+            }, f, indent=2)
+
+        # mkdtemp crée le répertoire en 0700
+        os.chmod(staging, 0o755)
+        os.rename(staging, self.version_dir(version))
+        print(f"📦 Version publiée dans le registre: {version}")
+
+        # Sommes de contrôle calculées à l'instant : inutile de relire les fichiers
+        if activate:
+            self.set_current(version, verify=False)
+        return version
+
+    def verify(self, version: str):
+        """Comparer les fichiers d'une version à son manifeste, ValueError en cas d'écart"""
+        expected = self.manifest(version)["files"]
+        actual = self._checksums(self.version_dir(version))
+        if actual != expected:
+            altered = sorted(
+                name for name in set(expected) | set(actual)
+                if expected.get(name) != actual.get(name)
+            )
+            raise ValueError(f"Version {version} altérée (somme de contrôle): {', '.join(altered)}")
+
+    def _write_pointer(self, pointer: Optional[Dict]):
+        """Remplacer atomiquement le pointeur CURRENT (None le supprime)"""
+        if pointer is None:
+            try:
+                os.remove(self.pointer_path)
+            except FileNotFoundError:
+                pass
+            return
+
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".pointer-", dir=self.root)
+        with os.fdopen(fd, "w") as f:
+            json.dump(pointer, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, self.pointer_path)
+
+    def set_current(self, version: str, verify: bool = True) -> Optional[Dict]:
+        """
+        Faire pointer CURRENT sur une version publiée, après vérification de ses
+        sommes de contrôle. Renvoie l'ancien pointeur (pour restore_pointer).
+        """
+        if version not in self.versions():
+            raise ValueError(f"Version inconnue: {version}")
+        if verify:
+            self.verify(version)
+
+        previous = self.pointer()
+        self._write_pointer({
+            "version": version,
+            "previous": previous["version"] if previous else None,
+            "activated_at": datetime.now(timezone.utc).isoformat(),
+        })
+        return previous
+
+    def rollback(self) -> Optional[Dict]:
+        """Revenir à la version active avant la version courante"""
+        pointer = self.pointer()
+        if not pointer or not pointer.get("previous"):
+            raise ValueError("Aucune version précédente vers laquelle revenir")
+        return self.set_current(pointer["previous"])
+
+    def restore_pointer(self, pointer: Optional[Dict]):
+        """Rétablir un pointeur renvoyé par set_current (activation refusée)"""
+        self._write_pointer(pointer)
+
+    def prune(self, keep: int) -> List[str]:
+        """Supprimer les versions les plus anciennes au-delà de `keep`, hors courante et précédente"""
+        pointer = self.pointer() or {}
+        protected = {pointer.get("version"), pointer.get("previous")}
+        versions = self.versions()
+        removed = [
+            version for version in versions[:max(len(versions) - keep, 0)]
+            if version not in protected
+        ]
+        for version in removed:
+            shutil.rmtree(self.version_dir(version))
+        return removed
+
+
+# Instance globale du registre des modèles
+model_registry = ModelRegistry(settings.MODEL_REGISTRY_DIR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registre local des modèles")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Lister les versions publiées")
+    publish = commands.add_parser("publish", help="Publier un répertoire d'artefacts")
+    publish.add_argument("source_dir")
+    publish.add_argument("--no-activate", action="store_true")
+    activate = commands.add_parser("activate", help="Activer une version")
+    activate.add_argument("version")
+    commands.add_parser("rollback", help="Revenir à la version précédente")
+    verify = commands.add_parser("verify", help="Vérifier les sommes de contrôle d'une version")
+    verify.add_argument("version")
+    prune = commands.add_parser("prune", help="Supprimer les anciennes versions")
+    prune.add_argument("--keep", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        current = model_registry.current()
+        for version in model_registry.versions():
+            marker = "*" if version == current else " "
+            print(f"{marker} {version}  {model_registry.manifest(version)['created_at']}")
+    elif args.command == "publish":
+        model_registry.publish(args.source_dir, activate=not args.no_activate)
+    elif args.command == "activate":
+        model_registry.set_current(args.version)
+        print(f"✅ Version active: {args.version}")
+    elif args.command == "rollback":
+        model_registry.rollback()
+        print(f"✅ Version active: {model_registry.current()}")
+    elif args.command == "verify":
+        model_registry.verify(args.version)
+        print(f"✅ Version {args.version} intègre")
+    elif args.command == "prune":
+        for version in model_registry.prune(args.keep):
+            print(f"🗑️ Version supprimée: {version}")
+
+
+if __name__ == "__main__":
+    main()
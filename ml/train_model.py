@@ -1,113 +1,364 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import train_test_split, HalvingRandomSearchCV, StratifiedKFold
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import classification_report, accuracy_score
+from joblib import Memory
+import sklearn
+import argparse
+import json
 import pickle
 import os
+import shutil
+import tempfile
+import time
 from datetime import datetime
+from config import settings
+from ml.tree_engine import FlatForest
+from ml.bundle import COMPRESS_METHODS, build_bundle, preprocessing_bundle, save_bundle
+from ml.drift import build_baseline, save_baseline
+from ml.registry import model_registry
+from ml.model_selection import candidate_estimators, evaluate_candidates, pareto_frontier, select_model, summarize
 
-def train_obesity_model(data_path: str = "../../data/ObesityDataSet_raw_and_data_sinthetic.csv"):
+# Variables catégorielles à encoder
+CATEGORICAL_COLUMNS = [
+    'Gender', 'family_history_with_overweight', 'FAVC', 'CAEC',
+    'SMOKE', 'SCC', 'CALC', 'MTRANS'
+]
+
+# Espace de recherche des hyperparamètres de la forêt (préfixe "model__" du pipeline)
+PARAM_DISTRIBUTIONS = {
+    "model__n_estimators": [100, 200, 300],
+    "model__max_depth": [None, 10, 20, 30],
+    "model__min_samples_split": [2, 5, 10],
+    "model__min_samples_leaf": [1, 2, 4],
+    "model__max_features": ["sqrt", "log2", None],
+    "model__criterion": ["gini", "entropy"],
+}
+
+# Paramètres historiques, utilisés avec --no-search
+DEFAULT_PARAMS = {
+    "model__n_estimators": 100,
+    "model__max_depth": 20,
+    "model__min_samples_split": 5,
+    "model__min_samples_leaf": 2,
+}
+
+def load_dataset(data_path: str):
     """
-    Entraîne le modèle de classification d'obésité
+    Charge le CSV et encode les variables catégorielles et le target
     """
-    print("🚀 Début de l'entraînement du modèle...")
-    
-    # Charger les données
-    try:
-        df = pd.read_csv(data_path)
-        print(f"✅ Données chargées: {df.shape}")
-    except FileNotFoundError:
-        print(f"❌ Fichier non trouvé: {data_path}")
-        return
-    
-    # Préparation des données
-    print("🔄 Préparation des données...")
-    
-    # Variables catégorielles à encoder
-    categorical_columns = [
-        'Gender', 'family_history_with_overweight', 'FAVC', 'CAEC', 
-        'SMOKE', 'SCC', 'CALC', 'MTRANS'
-    ]
-    
+    df = pd.read_csv(data_path)
+    print(f"✅ Données chargées: {df.shape}")
+
     # Créer les encodeurs
     label_encoders = {}
-    for col in categorical_columns:
+    for col in CATEGORICAL_COLUMNS:
         le = LabelEncoder()
         df[col] = le.fit_transform(df[col])
         label_encoders[col] = le
-    
+
     # Séparer les features et le target
     X = df.drop('NObeyesdad', axis=1)
     y = df['NObeyesdad']
-    
+
     # Encoder le target
     target_encoder = LabelEncoder()
     y_encoded = target_encoder.fit_transform(y)
     label_encoders['target'] = target_encoder
-    
-    # Normaliser les features numériques
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    
+
+    return X, y_encoded, label_encoders
+
+def build_pipeline(random_state: int, memory=None) -> Pipeline:
+    """
+    Normalisation puis forêt. `memory` met en cache la normalisation de chaque
+    pli : elle n'est calculée qu'une fois pour tous les candidats évalués dessus.
+    """
+    return Pipeline(
+        [
+            ("scaler", StandardScaler()),
+            # Un seul thread par forêt : le parallélisme est porté par la recherche
+            ("model", RandomForestClassifier(random_state=random_state, n_jobs=1)),
+        ],
+        memory=memory
+    )
+
+def search_hyperparameters(X_train, y_train, random_state: int, n_jobs: int, cv_folds: int,
+                           n_candidates: int, cache_dir: str):
+    """
+    Recherche aléatoire par halving : tous les candidats sont évalués sur peu
+    d'échantillons, seul le meilleur tiers passe au tour suivant avec trois
+    fois plus de données. Les mauvaises configurations sont donc abandonnées tôt.
+    Le meilleur candidat du dernier tour est réentraîné sur tout le jeu d'entraînement.
+    """
+    search = HalvingRandomSearchCV(
+        build_pipeline(random_state, memory=Memory(cache_dir, verbose=0)),
+        PARAM_DISTRIBUTIONS,
+        n_candidates=n_candidates,
+        min_resources="exhaust",
+        factor=3,
+        cv=StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=random_state),
+        scoring="accuracy",
+        n_jobs=n_jobs,
+        random_state=random_state,
+        refit=True
+    )
+    search.fit(X_train, y_train)
+    return search
+
+def search_report(search, elapsed: float, random_state: int, top: int = 10) -> dict:
+    """
+    Résumé sérialisable de la recherche : meilleurs paramètres et meilleurs candidats
+    """
+    results = pd.DataFrame(search.cv_results_)
+    # Classement du dernier tour (les candidats éliminés tôt ont un rang sur moins de données)
+    results = results.sort_values(["iter", "rank_test_score"], ascending=[False, True])
+    candidates = [
+        {
+            "params": {name.removeprefix("model__"): value for name, value in row["params"].items()},
+            "iteration": int(row["iter"]),
+            "n_resources": int(row["n_resources"]),
+            "mean_cv_accuracy": float(row["mean_test_score"]),
+            "std_cv_accuracy": float(row["std_test_score"]),
+            "mean_fit_seconds": float(row["mean_fit_time"]),
+        }
+        for _, row in results.head(top).iterrows()
+    ]
+    return {
+        "best_params": {name.removeprefix("model__"): value for name, value in search.best_params_.items()},
+        "best_cv_accuracy": float(search.best_score_),
+        "n_candidates": [int(n) for n in search.n_candidates_],
+        "n_resources": [int(n) for n in search.n_resources_],
+        "search_seconds": elapsed,
+        "random_state": random_state,
+        "sklearn_version": sklearn.__version__,
+        "top_candidates": candidates,
+    }
+
+def train_obesity_model(
+    data_path: str = "../../data/ObesityDataSet_raw_and_data_sinthetic.csv",
+    output_dir: str = None,
+    search: bool = True,
+    n_jobs: int = -1,
+    cv_folds: int = 5,
+    n_candidates: int = 40,
+    random_state: int = 42,
+    params_path: str = None,
+    compare_models: bool = True,
+    latency_budget_ms: float = None,
+    engine: str = settings.INFERENCE_ENGINE,
+    activate: bool = True,
+    compress: int = 0,
+    compress_method: str = "zlib"
+):
+    """
+    Entraîne le modèle de classification d'obésité.
+
+    Avec `search`, les hyperparamètres sont choisis par validation croisée
+    (HalvingRandomSearchCV sur tous les cœurs) et un rapport est écrit dans
+    `output_dir/search_report.json`. `params_path` réutilise les meilleurs
+    paramètres d'un rapport précédent sans relancer la recherche.
+
+    Avec `compare_models`, la forêt retenue est comparée à d'autres candidats
+    (forêts réduites ou élaguées, gradient boosting, régression logistique) en
+    précision en validation croisée sur le jeu d'entraînement, latence p50/p99
+    sur le moteur `engine` et taille sérialisée. Le modèle sauvegardé est le
+    plus précis de la frontière de Pareto dont le p99 sur une ligne tient dans
+    `latency_budget_ms`. Le jeu de test ne sert qu'à la précision rapportée.
+
+    Le modèle et ses préprocesseurs sont exportés en un seul bundle
+    `pipeline.joblib` (encodage des catégories, normalisation, modèle), en
+    pickle brut ou compressé par joblib selon `compress` (niveau 0-9) et
+    `compress_method`. `preprocessing.joblib` reprend l'encodage et la
+    normalisation sans le modèle, pour le moteur mmap.
+
+    Sans `output_dir`, les artefacts sont écrits dans un répertoire de
+    préparation du registre puis publiés comme nouvelle version, activée
+    si `activate`.
+    """
+    print("🚀 Début de l'entraînement du modèle...")
+
+    # Charger les données
+    try:
+        X, y_encoded, label_encoders = load_dataset(data_path)
+    except FileNotFoundError:
+        print(f"❌ Fichier non trouvé: {data_path}")
+        return
+    target_encoder = label_encoders['target']
+
     # Split train/test
     X_train, X_test, y_train, y_test = train_test_split(
-        X_scaled, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded
-    )
-    
-    print("🤖 Entraînement du modèle...")
-    
-    # Entraîner le modèle
-    model = RandomForestClassifier(
-        n_estimators=100,
-        random_state=42,
-        max_depth=20,
-        min_samples_split=5,
-        min_samples_leaf=2
+        X, y_encoded, test_size=0.2, random_state=random_state, stratify=y_encoded
     )
-    
-    model.fit(X_train, y_train)
-    
-    # Évaluation
-    y_pred = model.predict(X_test)
+
+    publish = output_dir is None
+    if publish:
+        output_dir = model_registry.staging_dir()
+    os.makedirs(output_dir, exist_ok=True)
+    report = None
+    start = time.perf_counter()
+
+    if search and params_path is None:
+        print("🔎 Recherche des hyperparamètres (validation croisée)...")
+        with tempfile.TemporaryDirectory(prefix="pipeline-cache-") as cache_dir:
+            result = search_hyperparameters(
+                X_train, y_train, random_state, n_jobs, cv_folds, n_candidates, cache_dir
+            )
+            pipeline = result.best_estimator_
+            # Le cache est supprimé avec le répertoire temporaire
+            pipeline.set_params(memory=None)
+        report = search_report(result, time.perf_counter() - start, random_state)
+        print(f"✅ Meilleure précision en validation croisée: {report['best_cv_accuracy']:.4f}")
+        print(f"   Paramètres: {report['best_params']}")
+    else:
+        params = dict(DEFAULT_PARAMS)
+        if params_path is not None:
+            with open(params_path) as f:
+                params = {f"model__{name}": value for name, value in json.load(f)["best_params"].items()}
+        print(f"🤖 Entraînement du modèle: {params}")
+        pipeline = build_pipeline(random_state)
+        pipeline.set_params(model__n_jobs=n_jobs, **params)
+        pipeline.fit(X_train, y_train)
+
+    train_seconds = time.perf_counter() - start
+    scaler = pipeline.named_steps["scaler"]
+    model = pipeline.named_steps["model"]
+    # L'API prédit une ligne à la fois : pas de pool de threads joblib à l'inférence
+    model.set_params(n_jobs=None)
+
+    selection = None
+    if compare_models:
+        print(f"⏱️ Comparaison précision / coût d'inférence (moteur {engine})...")
+        records = evaluate_candidates(
+            candidate_estimators(model, random_state), scaler,
+            X_train, y_train, engine, n_jobs, cv_folds, random_state
+        )
+        frontier = pareto_frontier(records)
+        chosen = select_model(frontier, latency_budget_ms)
+        model = chosen["model"]
+        selection = {
+            "chosen": chosen["name"],
+            "latency_budget_ms": latency_budget_ms,
+            "engine": engine,
+            "frontier": [summarize(record) for record in frontier],
+            "candidates": [summarize(record) for record in records],
+        }
+        print(f"✅ Modèle retenu: {chosen['name']} "
+              f"(frontière: {', '.join(record['name'] for record in frontier)})")
+
+    # Évaluation sur le jeu de test, tenu à l'écart de la sélection
+    y_pred = model.predict(scaler.transform(X_test))
     accuracy = accuracy_score(y_test, y_pred)
-    
-    print(f"✅ Précision du modèle: {accuracy:.4f}")
+
+    print(f"✅ Précision du modèle: {accuracy:.4f} (entraînement {train_seconds:.1f} s)")
     print("\n📊 Rapport de classification:")
-    print(classification_report(y_test, y_pred, 
+    print(classification_report(y_test, y_pred,
                                target_names=target_encoder.classes_))
-    
-    # Créer le dossier models s'il n'existe pas
-    os.makedirs("models", exist_ok=True)
-    
-    # Sauvegarder le modèle et les préprocesseurs
-    print("💾 Sauvegarde du modèle et des préprocesseurs...")
-    
-    with open("models/model.pkl", "wb") as f:
-        pickle.dump(model, f)
-    
-    with open("models/scaler.pkl", "wb") as f:
-        pickle.dump(scaler, f)
-    
-    with open("models/label_encoders.pkl", "wb") as f:
-        pickle.dump(label_encoders, f)
-    
+
+    # Sauvegarder le modèle et les préprocesseurs en un seul bundle
+    print("💾 Sauvegarde du pipeline (encodage + normalisation + modèle)...")
+
+    bundle_path = os.path.join(output_dir, "pipeline.joblib")
+    bundle = build_bundle(list(X.columns), CATEGORICAL_COLUMNS, label_encoders, scaler, model)
+    save_bundle(bundle, bundle_path, compress=compress, method=compress_method)
+    # Préprocesseurs seuls (quelques Ko), chargés avec la forêt en mmap
+    save_bundle(preprocessing_bundle(bundle), os.path.join(output_dir, "preprocessing.joblib"))
+
+    # Forêt aplatie en .npy, chargeable en mmap et partagée entre workers.
+    # Un autre type de modèle est servi par sklearn : pas de tableaux périmés
+    forest_dir = os.path.join(output_dir, "forest")
+    try:
+        FlatForest.from_sklearn(model).save(forest_dir)
+    except ValueError:
+        shutil.rmtree(forest_dir, ignore_errors=True)
+
+    # Référence de dérive : features brutes d'entraînement et classes prédites sur le test
+    X_raw = X.copy()
+    for col in CATEGORICAL_COLUMNS:
+        X_raw[col] = label_encoders[col].inverse_transform(X[col])
+    save_baseline(
+        build_baseline(X_raw, CATEGORICAL_COLUMNS, target_encoder.classes_[y_pred], random_state),
+        os.path.join(output_dir, "drift_baseline.json")
+    )
+
     # Sauvegarder les métadonnées du modèle
     metadata = {
-        'model_name': 'RandomForestClassifier',
+        'model_name': type(model).__name__,
         'features': list(X.columns),
         'classes': list(target_encoder.classes_),
         'accuracy': accuracy,
+        'params': model.get_params(),
         'training_date': datetime.now().isoformat(),
-        'n_samples': len(df)
+        'training_seconds': train_seconds,
+        'n_samples': len(X),
+        'bundle': {
+            'compress': compress,
+            'compress_method': compress_method if compress else None,
+            'size_bytes': os.path.getsize(bundle_path),
+        }
     }
-    
-    with open("models/metadata.pkl", "wb") as f:
+    if selection is not None:
+        metadata['selection'] = selection
+    if report is not None:
+        metadata['cv_accuracy'] = report['best_cv_accuracy']
+        report['test_accuracy'] = accuracy
+        with open(os.path.join(output_dir, "search_report.json"), "w") as f:
+            json.dump(report, f, indent=2)
+
+    with open(os.path.join(output_dir, "metadata.pkl"), "wb") as f:
         pickle.dump(metadata, f)
-    
+
     print("✅ Modèle sauvegardé avec succès!")
+    if publish:
+        model_registry.publish(output_dir, activate=activate)
     return model, scaler, label_encoders, metadata
 
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement du modèle de prédiction d'obésité")
+    parser.add_argument("--data", default="data/ObesityDataSet_raw_and_data_sinthetic.csv")
+    parser.add_argument("--output-dir", default=None,
+                        help="Répertoire de sortie (par défaut : nouvelle version du registre)")
+    parser.add_argument("--no-activate", action="store_true",
+                        help="Publier la version dans le registre sans l'activer")
+    parser.add_argument("--no-search", action="store_true",
+                        help="Entraîner avec les paramètres par défaut, sans recherche")
+    parser.add_argument("--params", default=None,
+                        help="Réutiliser best_params d'un search_report.json")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Nombre de cœurs (-1 = tous)")
+    parser.add_argument("--cv", type=int, default=5, help="Nombre de plis de validation croisée")
+    parser.add_argument("--n-candidates", type=int, default=40,
+                        help="Configurations tirées au premier tour de la recherche")
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--no-compare", action="store_true",
+                        help="Ne pas comparer les modèles candidats en latence")
+    parser.add_argument("--latency-budget-ms", type=float, default=None,
+                        help="p99 maximal de prédiction d'une ligne pour le modèle retenu")
+    parser.add_argument("--engine", default=settings.INFERENCE_ENGINE, choices=["sklearn", "flat", "mmap"],
+                        help="Moteur d'inférence utilisé pour mesurer la latence")
+    parser.add_argument("--compress", type=int, default=0, choices=range(10),
+                        help="Niveau de compression joblib du bundle (0 = pickle brut, chargement le plus rapide)")
+    parser.add_argument("--compress-method", default="zlib", choices=COMPRESS_METHODS)
+    args = parser.parse_args()
+
+    train_obesity_model(
+        data_path=args.data,
+        output_dir=args.output_dir,
+        search=not args.no_search,
+        n_jobs=args.n_jobs,
+        cv_folds=args.cv,
+        n_candidates=args.n_candidates,
+        random_state=args.random_state,
+        params_path=args.params,
+        compare_models=not args.no_compare,
+        latency_budget_ms=args.latency_budget_ms,
+        engine=args.engine,
+        activate=not args.no_activate,
+        compress=args.compress,
+        compress_method=args.compress_method
+    )
+
 if __name__ == "__main__":
-    train_obesity_model()
\ No newline at end of file
+    main()
@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+
+# Tableaux écrits par FlatForest.save, un fichier .npy chacun
+ARRAY_NAMES = ("feature", "threshold", "children", "leaf_values", "roots", "classes")
+
+
+class FlatForest:
+    """
+    Forêt d'arbres aplatie en tableaux NumPy contigus.
+
+    Tous les noeuds de tous les arbres sont concaténés : chaque arbre est
+    évalué par un parcours vectorisé (un indice de noeud par ligne et par arbre),
+    sans la validation ni le dispatch joblib de sklearn à chaque appel.
+    Les feuilles bouclent sur elles-mêmes, ce qui permet d'itérer `max_depth`
+    fois sans masque.
+
+    Les tableaux peuvent être sauvegardés en .npy et rechargés en mmap lecture
+    seule : plusieurs workers partagent alors les mêmes pages physiques.
+    """
+
+    def __init__(self, feature, threshold, children, leaf_values, roots, classes, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        # children[2 * i] = fils gauche, children[2 * i + 1] = fils droit du noeud i
+        self.children = children
+        self.leaf_values = leaf_values
+        self.roots = roots
+        # Même ordre de colonnes que model.classes_ dans predict_proba
+        self.classes_ = classes
+        self.max_depth = int(max_depth)
+        self.n_estimators = len(roots)
+
+    @classmethod
+    def from_sklearn(cls, model) -> "FlatForest":
+        """Aplatir un RandomForestClassifier (ou ExtraTreesClassifier) entraîné"""
+        estimators = getattr(model, "estimators_", None)
+        if not estimators or not all(hasattr(e, "tree_") for e in estimators):
+            raise ValueError(f"{type(model).__name__} n'est pas une forêt d'arbres de décision")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+
+        for estimator in estimators:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+            # Même normalisation que DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(value / normalizer)
+            roots.append(offset)
+
+            max_depth = max(max_depth, tree.max_depth)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            children=np.ascontiguousarray(
+                np.column_stack([np.concatenate(lefts), np.concatenate(rights)]).ravel(),
+                dtype=np.intp
+            ),
+            leaf_values=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            classes=np.asarray(model.classes_),
+            max_depth=max_depth,
+        )
+
+    def save(self, directory: str):
+        """
+        Sauvegarder les tableaux en .npy (un fichier par tableau).
+
+        Chaque fichier est écrit à côté puis renommé : un processus qui a encore
+        l'ancien fichier en mmap garde l'ancien inode au lieu de lire un fichier tronqué.
+        """
+        os.makedirs(directory, exist_ok=True)
+        arrays = {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "children": self.children,
+            "leaf_values": self.leaf_values,
+            "roots": self.roots,
+            "classes": self.classes_,
+        }
+        arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+        # Scalaire 0-d (ascontiguousarray le transformerait en tableau 1-d)
+        arrays["max_depth"] = np.array(self.max_depth)
+        for name, array in arrays.items():
+            path = os.path.join(directory, f"{name}.npy")
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: str = "r") -> "FlatForest":
+        """Recharger les tableaux, en mmap lecture seule par défaut"""
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ARRAY_NAMES
+        }
+        max_depth = np.load(os.path.join(directory, "max_depth.npy")).item()
+        return cls(max_depth=max_depth, **arrays)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Indices des feuilles atteintes, de forme (n_samples, n_estimators)"""
+        # sklearn compare des features float32 aux seuils float64
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_samples, n_features = X.shape
+        values = X.ravel()
+        row_offsets = (np.arange(n_samples) * n_features)[:, np.newaxis]
+
+        nodes = np.repeat(self.roots[np.newaxis, :], n_samples, axis=0)
+        for _ in range(self.max_depth):
+            go_right = ~(values[row_offsets + self.feature[nodes]] <= self.threshold[nodes])
+            nodes = self.children[2 * nodes + go_right]
+
+        return nodes
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probabilités moyennes des arbres, dans l'ordre de model.classes_"""
+        leaves = self.apply(X)
+
+        # Accumulation arbre par arbre, dans le même ordre que sklearn
+        proba = self.leaf_values[leaves[:, 0]].copy()
+        for t in range(1, self.n_estimators):
+            proba += self.leaf_values[leaves[:, t]]
+        proba /= self.n_estimators
+
+        return proba
@@ -1,12 +1,16 @@
-from pydantic import BaseModel
-from typing import Dict, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 class PredictionInput(BaseModel):
+    # inf / nan (par ex. 1e309 en JSON) sont refusés avec une 422
+    model_config = ConfigDict(allow_inf_nan=False)
+    
     gender: str
     age: float
-    height: float
-    weight: float
+    # Strictement positifs : l'IMC des rollups divise par height²
+    height: float = Field(gt=0)
+    weight: float = Field(gt=0)
     family_history_with_overweight: str
     favc: str
     fcvc: float
@@ -29,7 +33,7 @@ class PredictionHistory(BaseModel):
     id: int
     predicted_class: str
     confidence: float
-    probabilities: str
+    probabilities: Dict[str, float]
     created_at: datetime
     
     # Features d'entrée
@@ -51,4 +55,12 @@ class PredictionHistory(BaseModel):
     mtrans: str
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PredictionHistoryPage(BaseModel):
+    # Lignes de PredictionHistory, restreintes aux champs demandés (id et created_at toujours inclus)
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+    has_more: bool
+    # Nombre total de prédictions, renvoyé uniquement sur la première page
+    total: Optional[int] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, validator
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class UserCreate(BaseModel):
@@ -34,4 +34,9 @@ class Token(BaseModel):
     token_type: str
 
 class TokenData(BaseModel):
-    username: Optional[str] = None
\ No newline at end of file
+    username: Optional[str] = None
+    user_id: Optional[int] = None
+
+class BulkUserAction(BaseModel):
+    action: Literal["delete", "activate", "deactivate"]
+    user_ids: List[int]
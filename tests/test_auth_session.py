@@ -0,0 +1,33 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from auth.jwt_handler import get_current_user
+from auth.user_cache import user_cache
+from conftest import hash_password
+from database.models import Base, User
+from schemas.user_schema import TokenData
+
+
+def test_user_lookup_returns_its_connection_to_the_pool(tmp_path):
+    """Après la lecture de l'utilisateur, la session de la requête ne garde aucune connexion"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'auth.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    user = User(username="pooluser", email="pool@example.com", hashed_password=hash_password("pw"))
+    session.add(user)
+    session.commit()
+    user_id = user.id
+    session.close()
+    user_cache.clear()
+
+    try:
+        current = get_current_user(TokenData(username="pooluser", user_id=user_id), session)
+        assert engine.pool.checkedout() == 0
+        # Attributs lus sans nouvelle requête, session toujours utilisable par la route
+        assert (current.id, current.username) == (user_id, "pooluser")
+        assert engine.pool.checkedout() == 0
+        assert session.query(User).count() == 1
+    finally:
+        session.close()
+        user_cache.clear()
+        engine.dispose()
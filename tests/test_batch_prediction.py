@@ -0,0 +1,46 @@
+from config import settings
+from database.models import Prediction
+
+
+def batch_inputs(sample_prediction_data, n):
+    """n entrées distinctes (âges croissants)"""
+    return [{**sample_prediction_data, "age": 18.0 + i} for i in range(n)]
+
+
+def test_batch_returns_one_result_per_row_in_order(client, auth_headers, sample_prediction_data):
+    inputs = batch_inputs(sample_prediction_data, 5)
+    response = client.post("/prediction/batch", json=inputs, headers=auth_headers)
+
+    assert response.status_code == 200
+    results = response.json()
+    assert len(results) == len(inputs)
+    # Même ordre que les prédictions unitaires
+    for item, result in zip(inputs, results):
+        single = client.post("/prediction/", json=item, headers=auth_headers).json()
+        assert result["predicted_class"] == single["predicted_class"]
+        assert result["probabilities"] == single["probabilities"]
+
+
+def test_batch_persists_every_row(client, auth_headers, sample_prediction_data, db_session, test_user):
+    inputs = batch_inputs(sample_prediction_data, 4)
+    results = client.post("/prediction/batch", json=inputs, headers=auth_headers).json()
+
+    rows = db_session.query(Prediction).filter(Prediction.user_id == test_user.id).order_by(Prediction.id).all()
+    assert [row.age for row in rows] == [item["age"] for item in inputs]
+    assert [row.predicted_class for row in rows] == [result["predicted_class"] for result in results]
+
+
+def test_empty_batch_writes_nothing(client, auth_headers, db_session):
+    response = client.post("/prediction/batch", json=[], headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json() == []
+    assert db_session.query(Prediction).count() == 0
+
+
+def test_batch_above_max_size_is_rejected(client, auth_headers, sample_prediction_data, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_BATCH_SIZE", 3)
+    response = client.post("/prediction/batch", json=batch_inputs(sample_prediction_data, 4), headers=auth_headers)
+
+    assert response.status_code == 413
+    assert db_session.query(Prediction).count() == 0
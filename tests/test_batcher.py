@@ -0,0 +1,88 @@
+import asyncio
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pydantic import ValidationError
+
+from ml.batcher import PredictionBatcher
+from schemas.prediction_schema import PredictionInput
+
+
+class FakeHandler:
+    """Lève sur tout lot contenant un poids non fini, comme le modèle sur inf"""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict_batch(self, inputs, return_probabilities=True):
+        self.calls.append(len(inputs))
+        if any(not math.isfinite(item.weight) for item in inputs):
+            raise ValueError("Input contains infinity")
+        return [{"predicted_class": "Normal_Weight", "weight": item.weight} for item in inputs]
+
+
+def test_batch_failure_only_fails_the_bad_entry(sample_prediction_data):
+    """Le lot est rejoué entrée par entrée : seule l'entrée invalide échoue"""
+    handler = FakeHandler()
+    good = PredictionInput(**sample_prediction_data)
+    # model_construct contourne la validation du schéma (entrée déjà en file)
+    bad = PredictionInput.model_construct(**{**sample_prediction_data, "weight": float("inf")})
+
+    async def run():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            batcher = PredictionBatcher(handler, executor, max_batch_size=8, max_wait_ms=50)
+            try:
+                return await asyncio.gather(
+                    batcher.predict(good), batcher.predict(bad), batcher.predict(good),
+                    return_exceptions=True
+                )
+            finally:
+                await batcher.close()
+
+    first, second, third = asyncio.run(run())
+    assert first["weight"] == 64.0
+    assert third["weight"] == 64.0
+    assert isinstance(second, ValueError)
+    # Un lot de 3 en échec, puis 3 prédictions unitaires
+    assert handler.calls == [3, 1, 1, 1]
+
+
+class BlockingHandler:
+    """Bloque le scoring jusqu'à `release` : simule un lot en cours à l'arrêt"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def predict_batch(self, inputs, return_probabilities=True):
+        self.started.set()
+        self.release.wait(5)
+        return [{"predicted_class": "Normal_Weight"} for _ in inputs]
+
+
+def test_close_cancels_the_batch_being_scored(sample_prediction_data):
+    """Les requêtes du lot en cours ne restent pas suspendues après close()"""
+    handler = BlockingHandler()
+    input_data = PredictionInput(**sample_prediction_data)
+
+    async def run():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            batcher = PredictionBatcher(handler, executor, max_batch_size=8, max_wait_ms=1)
+            pending = [asyncio.ensure_future(batcher.predict(input_data)) for _ in range(3)]
+            await asyncio.get_running_loop().run_in_executor(None, handler.started.wait, 5)
+
+            await batcher.close()
+            handler.release.set()
+            return await asyncio.wait_for(asyncio.gather(*pending, return_exceptions=True), 1)
+
+    outcomes = asyncio.run(run())
+    assert handler.started.is_set()
+    assert all(isinstance(outcome, asyncio.CancelledError) for outcome in outcomes)
+
+
+@pytest.mark.parametrize("value", [float("inf"), float("-inf"), float("nan")])
+def test_schema_rejects_non_finite_floats(sample_prediction_data, value):
+    with pytest.raises(ValidationError):
+        PredictionInput(**{**sample_prediction_data, "weight": value})
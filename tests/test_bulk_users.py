@@ -0,0 +1,68 @@
+import pytest
+
+from auth.user_cache import user_cache
+from config import settings
+from database.models import Prediction, PredictionDailyRollup, User
+from tests.test_rollups import direct_aggregate, post_predictions, rollup_totals, assert_totals_equal
+
+
+def bulk(client, headers, action, user_ids):
+    return client.post("/admin/users/bulk", json={"action": action, "user_ids": user_ids}, headers=headers)
+
+
+def test_bulk_delete_cascades_predictions_rollups_and_cached_tokens(client, db_session, test_user, test_admin_user,
+                                                                     auth_headers, admin_headers,
+                                                                     sample_prediction_data):
+    post_predictions(client, auth_headers, sample_prediction_data)
+    post_predictions(client, admin_headers, sample_prediction_data)
+    # Le jeton de test_user est servi depuis le cache après la première requête
+    assert client.get("/auth/me", headers=auth_headers).status_code == 200
+    assert user_cache.get(test_user.username) is not None
+    user_id = test_user.id
+
+    response = bulk(client, admin_headers, "delete", [user_id])
+
+    assert response.status_code == 200
+    assert response.json() == {"action": "delete", "affected": 1}
+    assert db_session.query(User).filter(User.id == user_id).count() == 0
+    assert db_session.query(Prediction).filter(Prediction.user_id == user_id).count() == 0
+    assert_totals_equal(rollup_totals(db_session), direct_aggregate(db_session, [test_admin_user.id]))
+    assert db_session.query(PredictionDailyRollup).count() > 0
+    assert client.get("/auth/me", headers=auth_headers).status_code == 401
+
+
+def test_bulk_deactivate_then_activate(client, test_user, auth_headers, admin_headers):
+    assert client.get("/auth/me", headers=auth_headers).json()["is_active"] is True
+
+    response = bulk(client, admin_headers, "deactivate", [test_user.id, test_user.id])
+    assert response.json() == {"action": "deactivate", "affected": 1}
+    # L'entrée en cache est invalidée : le nouvel état est relu en base
+    assert client.get("/auth/me", headers=auth_headers).json()["is_active"] is False
+    login = {"username": "testuser", "password": "testpassword"}
+    assert client.post("/auth/login", json=login).status_code == 401
+
+    response = bulk(client, admin_headers, "activate", [test_user.id])
+    assert response.json() == {"action": "activate", "affected": 1}
+    assert client.get("/auth/me", headers=auth_headers).json()["is_active"] is True
+    assert client.post("/auth/login", json=login).status_code == 200
+
+
+def test_bulk_action_rejects_the_calling_admin(client, db_session, test_user, test_admin_user, admin_headers):
+    response = bulk(client, admin_headers, "delete", [test_user.id, test_admin_user.id])
+
+    assert response.status_code == 400
+    assert db_session.query(User).count() == 2
+
+
+def test_bulk_action_rejects_too_many_users(client, db_session, test_user, admin_headers, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_BULK_MAX_USERS", 2)
+
+    response = bulk(client, admin_headers, "deactivate", [test_user.id, 1000, 1001])
+
+    assert response.status_code == 413
+    db_session.refresh(test_user)
+    assert test_user.is_active is True
+
+
+def test_bulk_action_requires_admin(client, test_user, auth_headers):
+    assert bulk(client, auth_headers, "delete", [test_user.id]).status_code == 403
@@ -0,0 +1,86 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import DATA_PATH
+from ml.bundle import load_bundle, save_bundle, unpack_bundle
+from ml.model_handler import CATEGORICAL_COLUMNS, FEATURE_COLUMNS
+from ml.registry import METADATA_FILE, PIPELINE_FILE, model_registry
+from ml.train_model import load_dataset
+from schemas.prediction_schema import PredictionInput
+
+
+@pytest.fixture(scope="module")
+def label_encoders():
+    """Encodeurs ajustés comme à l'entraînement (mêmes classes que le modèle de test)"""
+    return load_dataset(DATA_PATH)[2]
+
+
+@pytest.fixture(scope="module")
+def features():
+    return pd.read_csv(DATA_PATH)[FEATURE_COLUMNS]
+
+
+@pytest.fixture
+def bundle(trained_model_dir):
+    return load_bundle(str(trained_model_dir / PIPELINE_FILE))
+
+
+@pytest.mark.parametrize("compress,method", [(0, "zlib"), (3, "zlib"), (3, "gzip"), (3, "lzma")])
+def test_save_and_load_round_trip(bundle, features, tmp_path, compress, method):
+    path = str(tmp_path / PIPELINE_FILE)
+
+    save_bundle(bundle, path, compress=compress, method=method)
+
+    with open(path, "rb") as f:
+        # Pickle brut reconnu à l'opcode PROTO, sinon en-tête du compresseur joblib
+        assert (f.read(1) == b"\x80") == (compress == 0)
+    loaded = load_bundle(path)
+    assert loaded["target_classes"] == bundle["target_classes"]
+    np.testing.assert_array_equal(
+        loaded["pipeline"].predict_proba(features), bundle["pipeline"].predict_proba(features)
+    )
+
+
+def test_bundle_matches_legacy_pickles(bundle, label_encoders, load_test_model, trained_model_dir, tmp_path):
+    """Le même modèle servi depuis le bundle ou depuis les trois pickles séparés"""
+    from_bundle = load_test_model()
+
+    model, scaler, categories, target_classes = unpack_bundle(bundle, FEATURE_COLUMNS)
+    legacy_dir = tmp_path / "legacy"
+    legacy_dir.mkdir()
+    for name, value in (("model.pkl", model), ("scaler.pkl", scaler), ("label_encoders.pkl", label_encoders)):
+        with open(legacy_dir / name, "wb") as f:
+            pickle.dump(value, f)
+    (legacy_dir / METADATA_FILE).write_bytes((trained_model_dir / METADATA_FILE).read_bytes())
+    model_registry.publish(str(legacy_dir))
+    from_pickles = load_test_model()
+
+    np.testing.assert_array_equal(from_bundle.target_classes, from_pickles.target_classes)
+    for col in CATEGORICAL_COLUMNS:
+        np.testing.assert_array_equal(categories[col], label_encoders[col].classes_)
+    inputs = [
+        PredictionInput(**{col.lower(): value for col, value in row.items()})
+        for row in pd.read_csv(DATA_PATH)[FEATURE_COLUMNS].head(300).to_dict("records")
+    ]
+    np.testing.assert_array_equal(from_bundle.preprocess_batch(inputs), from_pickles.preprocess_batch(inputs))
+    assert from_bundle.score_batch(inputs) == from_pickles.score_batch(inputs)
+
+
+def test_unknown_category_is_encoded_as_the_first_class(bundle, features, label_encoders):
+    """-1 de l'OrdinalEncoder remplacé par 0 : même code que la première classe connue"""
+    encoder = bundle["pipeline"].named_steps["encoder"]
+    frame = features.head(3).copy()
+    frame["MTRANS"] = ["Spaceship", label_encoders["MTRANS"].classes_[0], label_encoders["MTRANS"].classes_[1]]
+    frame["CALC"] = ["Daily", "Never", "no"]
+
+    encoded = encoder.transform(frame)
+
+    assert encoded["MTRANS"].tolist() == [0.0, 0.0, 1.0]
+    calc_classes = list(label_encoders["CALC"].classes_)
+    assert encoded["CALC"].tolist() == [
+        float(calc_classes.index(value)) if value in calc_classes else 0.0 for value in frame["CALC"]
+    ]
+    assert (encoded[CATEGORICAL_COLUMNS] >= 0).all().all()
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.drift import MAX_CATEGORIES, OTHER_CATEGORY, DriftMonitor, build_baseline
+from ml.model_handler import ModelHandler
+from schemas.prediction_schema import PredictionInput
+
+COLUMNS = ["Age", "Height", "MTRANS"]
+CATEGORICAL = ["MTRANS"]
+
+
+def sample(rng, n, shift=0.0):
+    """Deux features numériques et une catégorielle ; shift décale les numériques"""
+    return pd.DataFrame({
+        "Age": rng.normal(25 + shift * 5, 5, n),
+        "Height": rng.normal(1.7 + shift * 0.1, 0.1, n),
+        "MTRANS": rng.choice(["Walking", "Bike", "Public_Transportation"], n, p=[0.2, 0.3, 0.5]),
+    })
+
+
+def rows(frame):
+    return list(frame.itertuples(index=False, name=None))
+
+
+@pytest.fixture
+def baseline():
+    frame = sample(np.random.default_rng(0), 5000)
+    return build_baseline(frame, CATEGORICAL, ["Normal_Weight"] * 4000 + ["Obesity_Type_I"] * 1000)
+
+
+def test_streaming_moments_match_numpy_over_several_folds():
+    frame = sample(np.random.default_rng(1), 1000)
+    monitor = DriftMonitor(COLUMNS, CATEGORICAL, reservoir_size=64, buffer_size=37, seed=0)
+
+    # Tailles de lots et replis (tampon plein, report()) irréguliers
+    for start, stop in ((0, 10), (10, 300), (300, 301), (301, 1000)):
+        monitor.observe_many(rows(frame[start:stop]), ["Normal_Weight"] * (stop - start))
+        report = monitor.report()
+
+    assert report["samples"] == 1000
+    for col in ("Age", "Height"):
+        values = frame[col].to_numpy()
+        stats = report["features"][col]
+        assert stats["mean"] == pytest.approx(values.mean(), rel=1e-12)
+        assert stats["std"] == pytest.approx(values.std(), rel=1e-9)
+        assert (stats["min"], stats["max"]) == (values.min(), values.max())
+
+
+def test_reservoir_stays_bounded_and_holds_observed_rows():
+    frame = sample(np.random.default_rng(2), 3000)
+    monitor = DriftMonitor(COLUMNS, CATEGORICAL, reservoir_size=50, buffer_size=128, seed=0)
+
+    for row in rows(frame):
+        monitor.observe(row, "Normal_Weight")
+    monitor.report()
+
+    assert monitor._reservoir.shape == (50, 2)
+    observed = set(map(tuple, frame[["Age", "Height"]].to_numpy()))
+    assert set(map(tuple, monitor._reservoir)) <= observed
+    # Échantillon uniforme : pas seulement les premières lignes
+    first = set(map(tuple, frame[["Age", "Height"]].to_numpy()[:50]))
+    assert set(map(tuple, monitor._reservoir)) != first
+
+
+def test_categories_beyond_the_limit_are_counted_as_other():
+    monitor = DriftMonitor(COLUMNS, CATEGORICAL, reservoir_size=8, seed=0)
+    extra = 10
+
+    monitor.observe_many(
+        [(25.0, 1.7, f"mode-{i}") for i in range(MAX_CATEGORIES + extra)] + [(25.0, 1.7, "mode-0")],
+        ["Normal_Weight"] * (MAX_CATEGORIES + extra + 1)
+    )
+
+    counts = monitor.report()["features"]["MTRANS"]["counts"]
+    assert len(counts) == MAX_CATEGORIES + 1
+    assert counts[OTHER_CATEGORY] == extra
+    assert counts["mode-0"] == 2
+
+
+def test_psi_is_stable_for_the_same_distribution_and_significant_when_shifted(baseline):
+    same = sample(np.random.default_rng(3), 2000)
+    shifted = sample(np.random.default_rng(4), 2000, shift=1.0)
+
+    monitor = DriftMonitor(COLUMNS, CATEGORICAL, reservoir_size=512, seed=0)
+    monitor.reset(baseline)
+    monitor.observe_many(rows(same), ["Normal_Weight"] * 1600 + ["Obesity_Type_I"] * 400)
+    report = monitor.report()
+    assert report["max_psi"] < 0.02
+    assert report["drifted_features"] == []
+    assert report["predicted_class"]["psi"] == pytest.approx(0.0, abs=1e-9)
+
+    monitor.reset(baseline)
+    monitor.observe_many(rows(shifted), ["Obesity_Type_I"] * 2000)
+    report = monitor.report()
+    assert report["features"]["Age"]["status"] == "significant"
+    assert report["features"]["Height"]["status"] == "significant"
+    assert report["features"]["MTRANS"]["status"] == "stable"
+    assert report["predicted_class"]["status"] == "significant"
+    assert report["drifted_features"] == ["Age", "Height"]
+
+
+def test_model_activation_resets_the_monitor(load_test_model, sample_prediction_data):
+    handler = ModelHandler()
+    handler._activate(load_test_model())
+    handler.predict_batch([PredictionInput(**sample_prediction_data)] * 3)
+    assert handler.drift.report()["samples"] == 3
+
+    loaded = load_test_model()
+    handler._activate(loaded)
+
+    report = handler.drift.report()
+    assert report["samples"] == 0
+    assert handler.drift.baseline is loaded.drift_baseline
+    assert report["baseline_samples"] == loaded.drift_baseline["n_samples"]
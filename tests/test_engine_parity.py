@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import DATA_PATH
+from ml.model_handler import FEATURE_COLUMNS
+from ml.tree_engine import FlatForest
+from schemas.prediction_schema import PredictionInput
+
+
+@pytest.fixture(scope="module")
+def csv_inputs():
+    df = pd.read_csv(DATA_PATH)
+    return [
+        PredictionInput(**{col.lower(): row[col] for col in FEATURE_COLUMNS})
+        for row in df.to_dict("records")
+    ]
+
+
+@pytest.mark.parametrize("engine", ["flat", "mmap"])
+def test_engine_matches_sklearn(load_test_model, csv_inputs, engine):
+    """Probabilités à 1e-12 près et mêmes classes que RandomForestClassifier sur tout le CSV"""
+    reference = load_test_model("sklearn")
+    loaded = load_test_model(engine)
+    assert isinstance(loaded.engine, FlatForest)
+    if engine == "mmap":
+        # Tableaux lus en mmap depuis forest/ et préprocesseurs depuis
+        # preprocessing.joblib : la forêt sklearn n'est pas désérialisée
+        assert isinstance(loaded.engine.leaf_values, np.memmap)
+        assert loaded.model is None
+
+    X = reference.preprocess_batch(csv_inputs)
+    expected = reference.engine.predict_proba(X)
+    actual = loaded.engine.predict_proba(X)
+
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(actual.argmax(axis=1), expected.argmax(axis=1))
+    np.testing.assert_array_equal(loaded.engine.classes_, reference.engine.classes_)
+    assert loaded.class_names == reference.class_names
+
+    expected_results = reference.score_batch(csv_inputs)
+    actual_results = loaded.score_batch(csv_inputs)
+    assert [r["predicted_class"] for r in actual_results] == [r["predicted_class"] for r in expected_results]
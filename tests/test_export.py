@@ -0,0 +1,104 @@
+import csv
+import io
+import tracemalloc
+
+import pytest
+from sqlalchemy import insert, select
+
+from api.prediction_routes import HISTORY_FIELDS
+from config import settings
+from database.models import Prediction
+from utils.export import stream_csv
+
+N_ROWS = 5
+
+
+def prediction_rows(user_id, sample_prediction_data, n):
+    return [
+        {
+            "user_id": user_id, "predicted_class": "Normal_Weight", "confidence": 0.5 + i / (10 * n),
+            "probabilities": {"Normal_Weight": 0.5}, **sample_prediction_data
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def predictions(db_session, test_user, sample_prediction_data):
+    """N_ROWS prédictions de l'utilisateur de test"""
+    db_session.execute(insert(Prediction), prediction_rows(test_user.id, sample_prediction_data, N_ROWS))
+    db_session.commit()
+
+
+def history_query(user_id, limit=None):
+    columns = list(HISTORY_FIELDS)
+    query = (
+        select(*[getattr(Prediction, name) for name in columns])
+        .where(Prediction.user_id == user_id)
+        .order_by(Prediction.id)
+        .limit(limit)
+    )
+    return query, columns
+
+
+def test_csv_streams_one_chunk_per_partition(session_factory, test_user, predictions):
+    query, columns = history_query(test_user.id)
+    chunks = list(stream_csv(session_factory, query, columns, chunk_size=2))
+
+    # 5 lignes par blocs de 2 : trois partitions, l'en-tête dans la première
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert rows[0] == columns
+    assert len(rows) == N_ROWS + 1
+
+
+def test_export_route_streams_all_rows(client, auth_headers, predictions, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", 2)
+    response = client.get("/prediction/export", params={"format": "csv"}, headers=auth_headers)
+
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert len(rows) == N_ROWS + 1
+
+
+def test_csv_export_memory_stays_flat(db_session, session_factory, test_user, sample_prediction_data):
+    """Pic mémoire du flux à N et 10N lignes : borné par chunk_size, pas par le total"""
+    n = 2000
+    db_session.execute(insert(Prediction), prediction_rows(test_user.id, sample_prediction_data, 10 * n))
+    db_session.commit()
+
+    def peak(rows):
+        query, columns = history_query(test_user.id, limit=rows)
+        tracemalloc.start()
+        size = sum(len(chunk) for chunk in stream_csv(session_factory, query, columns, chunk_size=200))
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size, peak_bytes
+
+    size_n, peak_n = peak(n)
+    size_10n, peak_10n = peak(10 * n)
+
+    assert size_10n > 9 * size_n
+    # Dix fois plus de lignes, pic quasi identique (une liste complète le multiplierait par 10)
+    assert peak_10n < 1.5 * peak_n
+
+
+def test_parquet_without_pyarrow_returns_501(client, auth_headers, monkeypatch):
+    monkeypatch.setattr("utils.export.pa", None)
+    response = client.get("/prediction/export", params={"format": "parquet"}, headers=auth_headers)
+
+    assert response.status_code == 501
+    assert "pyarrow" in response.json()["detail"]
+
+
+def test_parquet_partitions_share_one_schema(session_factory, test_user, predictions):
+    pq = pytest.importorskip("pyarrow.parquet")
+    from utils.export import stream_parquet
+
+    query, columns = history_query(test_user.id)
+    data = b"".join(stream_parquet(session_factory, query, columns, chunk_size=2))
+    parquet_file = pq.ParquetFile(io.BytesIO(data))
+
+    assert parquet_file.metadata.num_row_groups == 3
+    assert parquet_file.schema_arrow.names == columns
+    assert parquet_file.read().num_rows == N_ROWS
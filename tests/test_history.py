@@ -0,0 +1,67 @@
+import base64
+from datetime import datetime
+
+import pytest
+
+from database.models import Prediction
+
+
+@pytest.fixture
+def same_time_predictions(db_session, test_user, sample_prediction_data):
+    """7 prédictions, dont 5 au même created_at : le curseur doit départager par id"""
+    timestamps = [datetime(2024, 1, 2)] + [datetime(2024, 1, 1)] * 5 + [datetime(2023, 12, 31)]
+    rows = [
+        Prediction(
+            user_id=test_user.id, predicted_class="Normal_Weight", confidence=0.9,
+            probabilities={"Normal_Weight": 0.9}, created_at=created_at, **sample_prediction_data
+        )
+        for created_at in timestamps
+    ]
+    db_session.add_all(rows)
+    db_session.commit()
+    return rows
+
+
+def test_pages_return_each_prediction_once(client, auth_headers, same_time_predictions):
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/prediction/history", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = pages[-1]["next_cursor"]
+        if not pages[-1]["has_more"]:
+            break
+
+    ids = [item["id"] for page in pages for item in page["items"]]
+    expected = sorted(same_time_predictions, key=lambda row: (row.created_at, row.id), reverse=True)
+    assert ids == [row.id for row in expected]
+    assert len(set(ids)) == len(same_time_predictions)
+    # total seulement sur la première page
+    assert pages[0]["total"] == len(same_time_predictions)
+    assert all(page.get("total") is None for page in pages[1:])
+    assert cursor is None
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!!",
+    base64.urlsafe_b64encode(b"2024-01-01T00:00:00|abc").decode(),
+    base64.urlsafe_b64encode(b"no separator").decode(),
+])
+def test_malformed_cursor_returns_400(client, auth_headers, cursor):
+    response = client.get("/prediction/history", params={"cursor": cursor}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_unknown_fields_return_400(client, auth_headers):
+    response = client.get("/prediction/history", params={"fields": "confidence,password"}, headers=auth_headers)
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
+
+
+def test_fields_projection(client, auth_headers, same_time_predictions):
+    response = client.get("/prediction/history", params={"fields": "confidence"}, headers=auth_headers)
+    item = response.json()["items"][0]
+    assert {key for key, value in item.items() if value is not None} == {"id", "created_at", "confidence"}
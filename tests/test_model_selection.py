@@ -0,0 +1,30 @@
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from ml.model_selection import evaluate_candidates, pareto_frontier, select_model
+
+
+def test_candidates_are_ranked_on_cross_validation_only():
+    """La précision de sélection est celle de la validation croisée sur le jeu d'entraînement"""
+    X, y = make_classification(n_samples=300, n_features=8, n_informative=5, n_classes=3, random_state=0)
+    scaler = StandardScaler().fit(X)
+    candidates = {
+        "forest": RandomForestClassifier(n_estimators=10, random_state=0),
+        "logistic": LogisticRegression(max_iter=500),
+    }
+
+    records = evaluate_candidates(candidates, scaler, X, y, engine="sklearn", n_jobs=1, cv_folds=3, random_state=0)
+
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=0)
+    expected = cross_val_score(make_pipeline(StandardScaler(), LogisticRegression(max_iter=500)), X, y, cv=cv)
+    logistic = next(record for record in records if record["name"] == "logistic")
+    assert np.isclose(logistic["cv_accuracy"], expected.mean())
+    assert all("accuracy" not in record for record in records)
+
+    chosen = select_model(pareto_frontier(records), latency_budget_ms=None)
+    assert chosen["cv_accuracy"] == max(record["cv_accuracy"] for record in records)
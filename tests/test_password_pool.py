@@ -0,0 +1,51 @@
+import threading
+
+import bcrypt
+
+from auth.password_pool import PasswordHashPool
+from config import settings
+from database.models import User
+
+
+def test_login_returns_429_when_the_pool_is_saturated(client, test_user, monkeypatch):
+    """Un seul hachage à la fois et aucune attente : la connexion suivante est refusée"""
+    pool = PasswordHashPool(max_workers=1, max_pending=0)
+    monkeypatch.setattr("auth.auth_routes.password_pool", pool)
+    started, release = threading.Event(), threading.Event()
+
+    def busy():
+        started.set()
+        release.wait(5)
+
+    holder = threading.Thread(target=pool.run, args=(busy,))
+    holder.start()
+    try:
+        assert started.wait(5)
+        response = client.post("/auth/login", json={"username": "testuser", "password": "testpassword"})
+    finally:
+        release.set()
+        holder.join()
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert pool.stats()["rejected"] == 1
+
+    # Le créneau est libéré : la connexion repasse
+    response = client.post("/auth/login", json={"username": "testuser", "password": "testpassword"})
+    assert response.status_code == 200
+
+
+def test_login_rehashes_a_hash_with_fewer_rounds(client, db_session):
+    """Un hachage d'un coût inférieur à BCRYPT_ROUNDS est régénéré à la connexion"""
+    old_hash = bcrypt.hashpw(b"weakpassword", bcrypt.gensalt(rounds=4)).decode()
+    user = User(username="olduser", email="old@example.com", hashed_password=old_hash)
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post("/auth/login", json={"username": "olduser", "password": "weakpassword"})
+
+    assert response.status_code == 200
+    db_session.refresh(user)
+    assert user.hashed_password != old_hash
+    assert user.hashed_password.split("$")[2] == f"{settings.BCRYPT_ROUNDS:02d}"
+    assert bcrypt.checkpw(b"weakpassword", user.hashed_password.encode())
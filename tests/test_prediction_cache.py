@@ -0,0 +1,30 @@
+from ml.model_handler import ModelHandler
+from ml.registry import model_registry
+from schemas.prediction_schema import PredictionInput
+
+
+def test_reload_invalidates_cached_predictions(load_test_model, trained_model_dir, sample_prediction_data):
+    """Une nouvelle version vide le cache, et la version fait partie de la clé"""
+    handler = ModelHandler()
+    handler._activate(load_test_model())
+    input_data = PredictionInput(**sample_prediction_data)
+
+    first = handler.predict(input_data)
+    assert handler.predict(input_data) is first
+    assert handler.cache.stats()["size"] == 1
+    old_key = handler._active.cache_key(input_data)
+    assert old_key[0] == handler.model_version
+
+    # Même modèle republié : nouvelle version dans le registre
+    model_registry.publish(str(trained_model_dir))
+    versions = handler.reload_model()
+    assert versions["model_version"] != versions["previous_version"]
+    assert handler.cache.stats()["size"] == 0
+
+    new_key = handler._active.cache_key(input_data)
+    assert new_key != old_key
+    assert new_key[1:] == old_key[1:]
+
+    second = handler.predict(input_data)
+    assert second is not first
+    assert second == first
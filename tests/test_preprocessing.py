@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import DATA_PATH
+from ml.model_handler import CATEGORICAL_COLUMNS, FEATURE_COLUMNS
+from ml.train_model import load_dataset
+from schemas.prediction_schema import PredictionInput
+
+
+def pandas_preprocess(label_encoders, scaler, input_data: PredictionInput) -> np.ndarray:
+    """Chemin historique : DataFrame d'une ligne, LabelEncoder.transform puis scaler.transform"""
+    df = pd.DataFrame([{col: getattr(input_data, col.lower()) for col in FEATURE_COLUMNS}])
+    for col in CATEGORICAL_COLUMNS:
+        try:
+            df[col] = label_encoders[col].transform(df[col])
+        except ValueError:
+            # Si la valeur n'est pas dans l'encodeur, utiliser la première classe
+            df[col] = 0
+    return scaler.transform(df)
+
+
+@pytest.fixture(scope="module")
+def label_encoders():
+    """Encodeurs ajustés comme à l'entraînement (mêmes classes que le modèle de test)"""
+    return load_dataset(DATA_PATH)[2]
+
+
+@pytest.fixture(scope="module")
+def csv_inputs():
+    df = pd.read_csv(DATA_PATH)
+    return [
+        PredictionInput(**{col.lower(): row[col] for col in FEATURE_COLUMNS})
+        for row in df.to_dict("records")
+    ]
+
+
+def test_vectorized_matches_pandas_on_training_csv(load_test_model, label_encoders, csv_inputs):
+    """preprocess_input et preprocess_batch reproduisent exactement le chemin pandas"""
+    loaded = load_test_model()
+    expected = np.vstack([pandas_preprocess(label_encoders, loaded.scaler, item) for item in csv_inputs])
+
+    np.testing.assert_array_equal(loaded.preprocess_batch(csv_inputs), expected)
+    singles = np.vstack([loaded.preprocess_input(item) for item in csv_inputs])
+    np.testing.assert_array_equal(singles, expected)
+
+
+def test_unknown_category_matches_pandas(load_test_model, label_encoders, sample_prediction_data):
+    """Une catégorie inconnue est codée comme la première classe dans les deux chemins"""
+    loaded = load_test_model()
+    inputs = [
+        PredictionInput(**{**sample_prediction_data, "mtrans": "Spaceship"}),
+        PredictionInput(**{**sample_prediction_data, "caec": "Never", "calc": "Daily"}),
+    ]
+    expected = np.vstack([pandas_preprocess(label_encoders, loaded.scaler, item) for item in inputs])
+
+    np.testing.assert_array_equal(loaded.preprocess_batch(inputs), expected)
+    for item, row in zip(inputs, expected):
+        np.testing.assert_array_equal(loaded.preprocess_input(item)[0], row)
@@ -0,0 +1,146 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from config import settings
+from ml.model_handler import LoadedModel
+from ml.registry import ENCODERS_FILE, METADATA_FILE, MODEL_FILE, SCALER_FILE, ModelRegistry, model_registry
+
+
+class SteppingDatetime(datetime):
+    """Horloge qui avance d'une minute à chaque appel : versions triées dans l'ordre de publication"""
+    current = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    @classmethod
+    def now(cls, tz=None):
+        SteppingDatetime.current += timedelta(minutes=1)
+        return cls.current
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr("ml.registry.datetime", SteppingDatetime)
+    return ModelRegistry(str(tmp_path / "registry"))
+
+
+def artifacts_dir(tmp_path, content: bytes):
+    """Jeu d'artefacts factice : le registre ne désérialise rien"""
+    directory = tmp_path / f"artifacts-{content.hex()}"
+    directory.mkdir()
+    (directory / MODEL_FILE).write_bytes(content)
+    for name in (SCALER_FILE, ENCODERS_FILE, METADATA_FILE):
+        (directory / name).write_bytes(name.encode())
+    return str(directory)
+
+
+def test_publish_writes_an_immutable_version_and_activates_it(registry, tmp_path, monkeypatch):
+    verified = []
+    monkeypatch.setattr(registry, "verify", verified.append)
+
+    version = registry.publish(artifacts_dir(tmp_path, b"v1"))
+
+    assert registry.versions() == [version]
+    assert registry.current() == version
+    assert set(registry.manifest(version)["files"]) == {MODEL_FILE, SCALER_FILE, ENCODERS_FILE, METADATA_FILE}
+    with open(registry.artifacts(version).model, "rb") as f:
+        assert f.read() == b"v1"
+    # Sommes de contrôle calculées à la publication : pas de seconde lecture
+    assert verified == []
+
+    other = registry.publish(artifacts_dir(tmp_path, b"v2"), activate=False)
+    assert registry.current() == version
+    registry.set_current(other)
+    assert verified == [other]
+
+
+def test_publish_requires_the_metadata(registry, tmp_path):
+    directory = artifacts_dir(tmp_path, b"v1")
+    os.remove(os.path.join(directory, METADATA_FILE))
+
+    with pytest.raises(FileNotFoundError):
+        registry.publish(directory)
+    assert registry.versions() == []
+
+
+def test_rollback_returns_to_the_previous_version(registry, tmp_path):
+    first = registry.publish(artifacts_dir(tmp_path, b"v1"))
+    second = registry.publish(artifacts_dir(tmp_path, b"v2"))
+    assert registry.pointer()["previous"] == first
+
+    registry.rollback()
+
+    assert registry.current() == first
+    assert registry.pointer()["previous"] == second
+
+
+def test_rollback_without_previous_version(registry, tmp_path):
+    registry.publish(artifacts_dir(tmp_path, b"v1"))
+
+    with pytest.raises(ValueError):
+        registry.rollback()
+
+
+def test_prune_keeps_the_newest_plus_current_and_previous(registry, tmp_path):
+    versions = [registry.publish(artifacts_dir(tmp_path, bytes([i])), activate=False) for i in range(5)]
+    registry.set_current(versions[1])
+    registry.set_current(versions[0])
+
+    removed = registry.prune(keep=2)
+
+    assert removed == [versions[2]]
+    assert registry.versions() == [versions[0], versions[1], versions[3], versions[4]]
+
+
+def test_tampered_version_is_refused(registry, tmp_path):
+    first = registry.publish(artifacts_dir(tmp_path, b"v1"))
+    second = registry.publish(artifacts_dir(tmp_path, b"v2"), activate=False)
+    with open(registry.artifacts(second).model, "ab") as f:
+        f.write(b"!")
+
+    with pytest.raises(ValueError, match=MODEL_FILE):
+        registry.set_current(second)
+    assert registry.current() == first
+
+
+def test_verify_on_load_is_opt_in(load_test_model, monkeypatch):
+    """Fichier ajouté après publication : détecté au chargement seulement si MODEL_VERIFY_ON_LOAD"""
+    version = model_registry.current()
+    with open(os.path.join(model_registry.version_dir(version), "extra.txt"), "w") as f:
+        f.write("ajouté après publication")
+
+    monkeypatch.setattr(settings, "MODEL_VERIFY_ON_LOAD", False)
+    assert load_test_model().version == version
+
+    monkeypatch.setattr(settings, "MODEL_VERIFY_ON_LOAD", True)
+    with pytest.raises(ValueError, match="extra.txt"):
+        LoadedModel.from_files()
+
+
+def test_failed_activation_restores_the_pointer(client, admin_headers, registry, tmp_path, monkeypatch):
+    """Version intègre mais illisible : le rechargement échoue et l'ancien pointeur est rétabli"""
+    monkeypatch.setattr("api.admin_routes.model_registry", registry)
+    monkeypatch.setattr(model_registry, "root", registry.root)
+    first = registry.publish(artifacts_dir(tmp_path, b"v1"))
+    pointer = registry.pointer()
+    broken = registry.publish(artifacts_dir(tmp_path, b"not a pickle"), activate=False)
+
+    response = client.post(f"/admin/model/activate/{broken}", headers=admin_headers)
+
+    assert response.status_code == 500
+    assert registry.current() == first
+    with open(registry.pointer_path) as f:
+        assert json.load(f) == pointer
+
+
+def test_activating_a_tampered_version_is_a_bad_request(client, admin_headers, registry, tmp_path, monkeypatch):
+    monkeypatch.setattr("api.admin_routes.model_registry", registry)
+    first = registry.publish(artifacts_dir(tmp_path, b"v1"))
+    second = registry.publish(artifacts_dir(tmp_path, b"v2"), activate=False)
+    os.remove(registry.artifacts(second).model)
+
+    response = client.post(f"/admin/model/activate/{second}", headers=admin_headers)
+
+    assert response.status_code == 400
+    assert registry.current() == first
@@ -0,0 +1,114 @@
+from datetime import date
+
+import pytest
+
+from api.admin_routes import stats_cache
+from database.models import Prediction, PredictionDailyRollup
+from database.rollups import apply_increments, remove_user_predictions
+
+
+def direct_aggregate(db_session, user_ids=None):
+    """{(jour, classe, genre): (count, somme confiance, somme IMC)} calculé sur la table predictions"""
+    totals = {}
+    query = db_session.query(Prediction)
+    if user_ids is not None:
+        query = query.filter(Prediction.user_id.in_(user_ids))
+    for row in query:
+        key = (row.created_at.date(), row.predicted_class, row.gender)
+        count, confidence_sum, bmi_sum = totals.get(key, (0, 0.0, 0.0))
+        totals[key] = (count + 1, confidence_sum + row.confidence, bmi_sum + row.weight / row.height ** 2)
+    return totals
+
+
+def rollup_totals(db_session):
+    return {
+        (row.day, row.predicted_class, row.gender): (row.prediction_count, row.confidence_sum, row.bmi_sum)
+        for row in db_session.query(PredictionDailyRollup)
+    }
+
+
+def assert_totals_equal(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, (count, confidence_sum, bmi_sum) in expected.items():
+        assert actual[key][0] == count
+        assert actual[key][1:] == pytest.approx((confidence_sum, bmi_sum))
+
+
+def post_predictions(client, headers, sample_prediction_data):
+    """Une prédiction unitaire et un lot de trois, deux genres"""
+    inputs = [
+        {**sample_prediction_data, "gender": gender, "weight": weight}
+        for gender, weight in (("Male", 95.0), ("Female", 50.0), ("Male", 70.0))
+    ]
+    assert client.post("/prediction/", json=sample_prediction_data, headers=headers).status_code == 200
+    assert client.post("/prediction/batch", json=inputs, headers=headers).status_code == 200
+
+
+@pytest.mark.parametrize("field,value", [("height", 0.0), ("height", -1.6), ("weight", 0.0)])
+def test_prediction_rejects_non_positive_height_and_weight(client, auth_headers, sample_prediction_data,
+                                                           db_session, field, value):
+    """Hauteur nulle : 422 au lieu d'un ZeroDivisionError dans le calcul de l'IMC des rollups"""
+    response = client.post("/prediction/", json={**sample_prediction_data, field: value}, headers=auth_headers)
+
+    assert response.status_code == 422
+    assert db_session.query(PredictionDailyRollup).count() == 0
+
+
+def test_single_and_batch_predictions_increment_rollups(client, auth_headers, sample_prediction_data, db_session):
+    post_predictions(client, auth_headers, sample_prediction_data)
+
+    assert sum(count for count, _, _ in rollup_totals(db_session).values()) == 4
+    assert_totals_equal(rollup_totals(db_session), direct_aggregate(db_session))
+
+
+def test_remove_user_predictions_decrements_rollups(client, auth_headers, admin_headers, sample_prediction_data,
+                                                     db_session, test_user, test_admin_user):
+    post_predictions(client, auth_headers, sample_prediction_data)
+    post_predictions(client, admin_headers, sample_prediction_data)
+
+    remove_user_predictions(db_session, [test_user.id])
+    db_session.query(Prediction).filter(Prediction.user_id == test_user.id).delete()
+    db_session.commit()
+
+    assert_totals_equal(rollup_totals(db_session), direct_aggregate(db_session, [test_admin_user.id]))
+
+
+def test_admin_stats_and_analytics_match_predictions(client, auth_headers, admin_headers,
+                                                    sample_prediction_data, db_session):
+    post_predictions(client, auth_headers, sample_prediction_data)
+    stats_cache.clear()
+    expected = direct_aggregate(db_session)
+
+    stats = client.get("/admin/stats", headers=admin_headers).json()
+    assert stats["total_predictions"] == 4
+    per_class = {}
+    for (_, predicted_class, _), (count, _, _) in expected.items():
+        per_class[predicted_class] = per_class.get(predicted_class, 0) + count
+    assert stats["predictions_per_class"] == per_class
+    assert stats["predictions_per_day"] == {date.today().isoformat(): 4}
+
+    analytics = client.get("/admin/analytics", headers=admin_headers).json()
+    rows = {(date.fromisoformat(row["day"]), row["predicted_class"], row["gender"]): row for row in analytics["rows"]}
+    assert rows.keys() == expected.keys()
+    for key, (count, confidence_sum, bmi_sum) in expected.items():
+        assert rows[key]["count"] == count
+        assert rows[key]["mean_confidence"] == pytest.approx(confidence_sum / count)
+        assert rows[key]["mean_bmi"] == pytest.approx(bmi_sum / count)
+
+
+def test_generic_fallback_without_native_upsert(db_session, monkeypatch):
+    """Dialecte sans INSERT ... ON CONFLICT : UPDATE puis INSERT clé par clé, mêmes totaux"""
+    monkeypatch.setattr("database.rollups._dialect_insert", lambda db: None)
+    day = date(2024, 1, 1)
+
+    apply_increments(db_session, {(day, "Normal_Weight", "Male"): [2, 1.5, 44.0]})
+    apply_increments(db_session, {
+        (day, "Normal_Weight", "Male"): [1, 0.5, 22.0],
+        (day, "Obesity_Type_I", "Female"): [1, 0.9, 31.0],
+    })
+    apply_increments(db_session, {(day, "Obesity_Type_I", "Female"): [-1, -0.9, -31.0]})
+
+    assert_totals_equal(rollup_totals(db_session), {
+        (day, "Normal_Weight", "Male"): (3, 2.0, 66.0),
+        (day, "Obesity_Type_I", "Female"): (0, 0.0, 0.0),
+    })
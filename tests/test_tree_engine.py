@@ -0,0 +1,24 @@
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+
+from ml.tree_engine import FlatForest
+
+
+def test_save_load_predict_round_trip(tmp_path):
+    """FlatForest.save puis load (copie et mmap) prédit comme la forêt sklearn"""
+    X, y = make_classification(n_samples=300, n_features=6, n_informative=4, n_classes=3, random_state=0)
+    model = RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0).fit(X, y)
+    forest = FlatForest.from_sklearn(model)
+    forest.save(str(tmp_path))
+
+    # max_depth est un scalaire 0-d, relisible par int()
+    assert np.load(tmp_path / "max_depth.npy").ndim == 0
+
+    expected = model.predict_proba(X)
+    for mmap_mode in (None, "r"):
+        loaded = FlatForest.load(str(tmp_path), mmap_mode=mmap_mode)
+        assert loaded.max_depth == forest.max_depth
+        np.testing.assert_array_equal(loaded.classes_, model.classes_)
+        np.testing.assert_allclose(loaded.predict_proba(X), expected, rtol=0, atol=1e-12)
+
@@ -0,0 +1,35 @@
+from auth.jwt_handler import create_access_token
+from auth.user_cache import user_cache
+from conftest import hash_password
+from database.models import User
+
+
+def test_reregistered_username_is_not_served_from_cache(client, db_session, test_user, auth_headers):
+    """Compte supprimé puis nom réenregistré pendant le TTL : le cache ne ressert pas l'ancien id"""
+    old_id = test_user.id
+    response = client.get("/auth/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert user_cache.get(test_user.username)["id"] == old_id
+
+    # Suppression et réenregistrement faits par un autre worker : ce cache n'est pas invalidé
+    db_session.delete(test_user)
+    db_session.commit()
+    # id explicite : SQLite réutiliserait sinon l'id libéré
+    new_user = User(
+        id=old_id + 100, username="testuser", email="new@example.com",
+        hashed_password=hash_password("otherpassword"), is_admin=False, is_active=True
+    )
+    db_session.add(new_user)
+    db_session.commit()
+    db_session.refresh(new_user)
+    assert new_user.id != old_id
+
+    new_token = create_access_token(data={"sub": new_user.username, "uid": new_user.id})
+    response = client.get("/auth/me", headers={"Authorization": f"Bearer {new_token}"})
+    assert response.status_code == 200
+    assert response.json()["id"] == new_user.id
+    assert response.json()["email"] == "new@example.com"
+
+    # Le jeton de l'ancien compte ne donne pas accès au nouveau
+    response = client.get("/auth/me", headers=auth_headers)
+    assert response.status_code == 401
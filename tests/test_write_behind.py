@@ -0,0 +1,143 @@
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import sessionmaker
+
+from api.prediction_routes import prediction_row
+from config import settings
+from conftest import hash_password
+from database.database import enable_sqlite_foreign_keys
+from database.models import Base, Prediction, PredictionDailyRollup, User
+from database.write_behind import PredictionWriter
+from schemas.prediction_schema import PredictionInput
+
+RESULT = {"predicted_class": "Normal_Weight", "confidence": 0.8, "probabilities": {"Normal_Weight": 0.8}}
+
+
+@pytest.fixture
+def writer_db(tmp_path):
+    """Base SQLite sur fichier (le thread d'écriture ouvre ses propres connexions) et un utilisateur"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'writer.db'}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", enable_sqlite_foreign_keys)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with factory() as db:
+        user = User(username="writer", email="writer@example.com", hashed_password=hash_password("pw"))
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    yield factory, user_id
+    engine.dispose()
+
+
+@pytest.fixture
+def make_writer(writer_db):
+    writers = []
+
+    def make(**options) -> PredictionWriter:
+        options = {"max_queue": 100, "batch_size": 3, "flush_interval_ms": 60000, **options}
+        writer = PredictionWriter(writer_db[0], **options)
+        writer.start()
+        writers.append(writer)
+        return writer
+
+    yield make
+    for writer in writers:
+        writer.stop(timeout=5)
+
+
+def rows(user_id, count, sample_prediction_data):
+    created_at = datetime.utcnow()
+    return [prediction_row(user_id, PredictionInput(**sample_prediction_data), RESULT, created_at)
+            for _ in range(count)]
+
+
+def stored(factory):
+    with factory() as db:
+        predictions = db.query(Prediction).count()
+        rollup_count = db.query(func.coalesce(func.sum(PredictionDailyRollup.prediction_count), 0)).scalar()
+    return predictions, rollup_count
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "délai dépassé"
+        time.sleep(0.01)
+
+
+def test_full_batch_is_flushed_without_waiting_for_the_interval(writer_db, make_writer, sample_prediction_data):
+    factory, user_id = writer_db
+    writer = make_writer(batch_size=3)
+
+    assert writer.submit(rows(user_id, 3, sample_prediction_data))
+    wait_for(lambda: writer.flushed_rows == 3)
+
+    assert writer.flushes == 1
+    assert stored(factory) == (3, 3)
+
+
+def test_partial_batch_is_flushed_when_the_oldest_row_is_due(writer_db, make_writer, sample_prediction_data):
+    factory, user_id = writer_db
+    writer = make_writer(batch_size=100, flush_interval_ms=50)
+
+    assert writer.submit(rows(user_id, 2, sample_prediction_data))
+    wait_for(lambda: writer.flushed_rows == 2)
+
+    assert writer.flushes == 1
+    assert stored(factory) == (2, 2)
+
+
+def test_stop_drains_the_queue(writer_db, make_writer, sample_prediction_data):
+    factory, user_id = writer_db
+    writer = make_writer(batch_size=3)
+
+    assert writer.submit(rows(user_id, 5, sample_prediction_data))
+    writer.stop(timeout=5)
+
+    assert not writer.running
+    assert writer.stats()["queue_depth"] == 0
+    assert writer.flushed_rows == 5
+    assert stored(factory) == (5, 5)
+    # Écrivain arrêté : les lignes sont refusées
+    assert not writer.submit(rows(user_id, 1, sample_prediction_data))
+    assert writer.rejected_rows == 1
+
+
+def test_failing_row_does_not_drop_the_rest_of_its_batch(writer_db, make_writer, sample_prediction_data):
+    factory, user_id = writer_db
+    writer = make_writer(batch_size=8)
+    batch = rows(user_id, 8, sample_prediction_data)
+    # Utilisateur supprimé avant l'écriture : violation de clé étrangère
+    batch[5]["user_id"] = user_id + 1000
+
+    assert writer.submit(batch)
+    wait_for(lambda: writer.flushed_rows + writer.failed_rows == 8)
+
+    assert (writer.flushed_rows, writer.failed_rows) == (7, 1)
+    assert stored(factory) == (7, 7)
+
+
+@pytest.mark.parametrize("max_queue,started", [(0, True), (100, False)])
+def test_predictions_are_saved_synchronously_when_the_writer_refuses(client, db_session, auth_headers,
+                                                                     sample_prediction_data, writer_db,
+                                                                     monkeypatch, max_queue, started):
+    """File pleine ou écrivain arrêté : la route enregistre elle-même, rien n'est perdu"""
+    writer = PredictionWriter(writer_db[0], max_queue=max_queue, batch_size=3, flush_interval_ms=60000)
+    if started:
+        writer.start()
+    monkeypatch.setattr(settings, "PREDICTION_WRITE_MODE", "write_behind")
+    monkeypatch.setattr("api.prediction_routes.prediction_writer", writer)
+
+    try:
+        assert client.post("/prediction/", json=sample_prediction_data, headers=auth_headers).status_code == 200
+        response = client.post("/prediction/batch", json=[sample_prediction_data] * 2, headers=auth_headers)
+        assert response.status_code == 200
+    finally:
+        writer.stop(timeout=5)
+
+    assert writer.rejected_rows == 3
+    assert db_session.query(Prediction).count() == 3
+    assert stored(writer_db[0]) == (0, 0)
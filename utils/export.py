@@ -0,0 +1,154 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Iterator, List
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.orm import sessionmaker
+
+from config import settings
+
+# Dépendance optionnelle : l'export Parquet n'est disponible que si pyarrow est installé
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_available() -> bool:
+    return pa is not None
+
+
+def _iter_partitions(session_factory: sessionmaker, query: Select, chunk_size: int) -> Iterator[List]:
+    """
+    Parcourir le résultat par blocs de `chunk_size` lignes via un curseur serveur.
+
+    Le générateur est consommé par la réponse après le retour de la route : il
+    ouvre sa propre session (get_session_factory) et la ferme à la fin du flux,
+    sans dépendre de l'ordre de fermeture des dépendances de FastAPI.
+    """
+    db = session_factory()
+    try:
+        result = db.execute(query.execution_options(stream_results=True, yield_per=chunk_size))
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def _format_value(value):
+    """Les probabilités (dict) sont exportées en texte JSON"""
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+
+def stream_csv(session_factory: sessionmaker, query: Select, columns: List[str], chunk_size: int = None) -> Iterator[bytes]:
+    """Générer le CSV bloc par bloc : en-tête puis un morceau par partition"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    for partition in _iter_partitions(session_factory, query, chunk_size or settings.EXPORT_CHUNK_SIZE):
+        writer.writerows([_format_value(value) for value in row] for row in partition)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    # En-tête seul si aucune ligne
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Flux en écriture seule dont on récupère les octets écrits depuis la dernière lecture"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def parquet_schema(query: Select, columns: List[str]) -> "pa.Schema":
+    """
+    Schéma Arrow fixé d'après les types SQL des colonnes sélectionnées, et non
+    inféré par partition (une partition où une colonne est entièrement nulle
+    aurait sinon un autre type que la première)
+    """
+    arrow_types = {
+        int: pa.int64(),
+        float: pa.float64(),
+        bool: pa.bool_(),
+        str: pa.string(),
+        datetime: pa.timestamp("us"),
+        date: pa.date32(),
+    }
+    fields = []
+    for name, column in zip(columns, query.selected_columns):
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            python_type = str
+        # JSON (dict) et types inconnus : exportés en texte
+        fields.append(pa.field(name, arrow_types.get(python_type, pa.string())))
+    return pa.schema(fields)
+
+
+def stream_parquet(session_factory: sessionmaker, query: Select, columns: List[str], chunk_size: int = None) -> Iterator[bytes]:
+    """Générer un fichier Parquet avec un row group par partition"""
+    sink = _ChunkSink()
+    schema = parquet_schema(query, columns)
+    writer = pq.ParquetWriter(sink, schema)
+
+    for partition in _iter_partitions(session_factory, query, chunk_size or settings.EXPORT_CHUNK_SIZE):
+        table = pa.Table.from_pydict({
+            name: [_format_value(row[i]) for row in partition]
+            for i, name in enumerate(columns)
+        }, schema=schema)
+        writer.write_table(table)
+        yield sink.drain()
+
+    # Aucune ligne : fichier valide, au même schéma
+    writer.close()
+    yield sink.drain()
+
+
+def export_response(session_factory: sessionmaker, query: Select, columns: List[str], export_format: str,
+                    filename: str) -> StreamingResponse:
+    """Réponse HTTP en flux (chunked) : la mémoire reste bornée par EXPORT_CHUNK_SIZE lignes"""
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {export_format}")
+    if export_format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+
+    stream = stream_parquet if export_format == "parquet" else stream_csv
+    return StreamingResponse(
+        stream(session_factory, query, columns),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )